@@ -0,0 +1,59 @@
+from __future__ import annotations
+from collections import deque
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+class _Indexed(Dataset):
+    """Wraps a dataset so every item also carries its index."""
+    def __init__(self, ds: Dataset): self.ds = ds
+    def __len__(self): return len(self.ds)
+    def __getitem__(self, i):
+        x, y = self.ds[i]
+        return x, y, i
+
+class AuxBatchStream:
+    """
+    Long-lived source of auxiliary training batches (noise samples, ΔL evaluation), separate
+    from the training loader. One shuffled DataLoader with persistent workers is iterated
+    across epochs, so workers are spawned once and successive draws continue through the
+    shuffle instead of restarting it; `prefetch` batches are kept already moved to `device`.
+    Shuffle order and worker seeds come from `seed`. Indices of every drawn batch are
+    recorded with a tag until drain_log() is called.
+    """
+    def __init__(self, dataset: Dataset, batch_size: int, num_workers: int = 2, seed: int = 0,
+                 prefetch: int = 2, device: str | torch.device = "cpu"):
+        self.device = torch.device(device)
+        self.prefetch = max(1, prefetch)
+        g = torch.Generator(); g.manual_seed(seed)
+        self.loader = DataLoader(_Indexed(dataset), batch_size=batch_size, shuffle=True, drop_last=True,
+                                 num_workers=num_workers, generator=g, pin_memory=self.device.type == "cuda",
+                                 persistent_workers=num_workers > 0,
+                                 prefetch_factor=self.prefetch if num_workers > 0 else None)
+        self._it = None; self._queue: deque = deque()
+        self.epochs = 0; self.drawn = 0
+        self._log: list[dict] = []
+
+    def _fill(self) -> None:
+        while len(self._queue) < self.prefetch:
+            if self._it is None:
+                self._it = iter(self.loader)
+            try:
+                x, y, idx = next(self._it)
+            except StopIteration:
+                self._it = None; self.epochs += 1
+                continue
+            self._queue.append((x.to(self.device, non_blocking=True), y.to(self.device, non_blocking=True), idx))
+
+    def next(self, tag: str = "") -> tuple[torch.Tensor, torch.Tensor]:
+        self._fill()
+        x, y, idx = self._queue.popleft()
+        self._log.append({"tag": tag, "indices": idx.tolist()})
+        self.drawn += 1
+        return x, y
+
+    def take(self, n: int, tag: str = "") -> list[tuple[torch.Tensor, torch.Tensor]]:
+        return [self.next(tag) for _ in range(max(0, n))]
+
+    def drain_log(self) -> list[dict]:
+        log, self._log = self._log, []
+        return log
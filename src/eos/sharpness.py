@@ -1,13 +1,60 @@
 from __future__ import annotations
 import torch
-def power_max_eig(apply_H, dim: int, iters: int = 50, tol: float = 1e-5, device="cpu", seed: int = 0):
+from ..utils.workspace import Workspace, matvec_into
+def power_max_eig(apply_H, dim: int, iters: int = 50, tol: float = 1e-5, device="cpu", seed: int = 0,
+                  ws: Workspace | None = None, v0: torch.Tensor | None = None):
     g = torch.Generator(device=device); g.manual_seed(seed)
-    v = torch.randn(dim, generator=g, device=device); v = v / (v.norm() + 1e-12)
+    ws = ws or Workspace(); w = ws.get("power_w", dim, device=device)
+    if v0 is None:
+        v = torch.empty(dim, device=device).normal_(generator=g)
+    else:
+        v = v0.detach().clone()
+    v.div_(v.norm() + 1e-12)
     last = None
     for _ in range(iters):
-        w = apply_H(v); lam = (v @ w).item()
-        v = w / (w.norm() + 1e-12)
+        matvec_into(apply_H, v, w); lam = (v @ w).item()
+        v.copy_(w).div_(w.norm() + 1e-12)
         if last is not None and abs(lam - last) < tol * max(1.0, abs(lam)): break
         last = lam
-    lam = (v @ apply_H(v)).item()
+    lam = (v @ matvec_into(apply_H, v, w)).item()
     return float(lam), v
+
+class SharpnessTracker:
+    """
+    Persistent λ_max estimate across training steps. Keeps the dominant eigenvector and
+    refines it with a few warm power iterations per step; a full power_max_eig solve
+    (warm-started from the kept vector) runs only when the Rayleigh-quotient residual
+    ||Hv - λv|| stays above tol * max(1, |λ|). seed() lets callers hand over a fresher
+    direction, e.g. the top vector of a top-k solve.
+    """
+    def __init__(self, dim: int, refine_iters: int = 2, tol: float = 1e-2, full_iters: int = 30,
+                 full_tol: float = 1e-3, device="cpu", seed: int = 0):
+        self.dim, self.refine_iters, self.tol = dim, refine_iters, tol
+        self.full_iters, self.full_tol = full_iters, full_tol
+        self.device, self.seed_value = device, seed
+        self.v: torch.Tensor | None = None
+        self.lam = float("nan"); self.residual = float("nan")
+        self.used_full = False; self.full_solves = 0; self.updates = 0
+
+    def seed(self, v: torch.Tensor) -> None:
+        self.v = v.detach().clone(); self.v.div_(self.v.norm() + 1e-12)
+
+    def update(self, apply_H, ws: Workspace | None = None) -> float:
+        ws = ws or Workspace(); w = ws.get("power_w", self.dim, device=self.device)
+        self.updates += 1; self.used_full = False
+        if self.v is not None:
+            v = self.v
+            for _ in range(max(1, self.refine_iters)):
+                matvec_into(apply_H, v, w); lam = (v @ w).item()
+                nrm = float(w.norm())
+                res = max(nrm * nrm - lam * lam, 0.0) ** 0.5   # ||w - λv|| for unit v
+                if res <= self.tol * max(1.0, abs(lam)):
+                    self.lam, self.residual = float(lam), float(res)
+                    return self.lam
+                v.copy_(w).div_(nrm + 1e-12)
+        self.lam, self.v = power_max_eig(apply_H, dim=self.dim, iters=self.full_iters, tol=self.full_tol,
+                                         device=self.device, seed=self.seed_value, ws=ws, v0=self.v)
+        w = ws.get("power_w", self.dim, device=self.device)  # holds H v from the final Rayleigh quotient
+        self.residual = float(w.add_(self.v, alpha=-self.lam).norm())
+        self.used_full = True; self.full_solves += 1
+        return self.lam
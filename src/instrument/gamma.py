@@ -2,6 +2,7 @@ from __future__ import annotations
 import math
 import torch
 from torch import Tensor
+from .operator import apply_block
 
 
 def _project_S(x: Tensor, V: Tensor) -> Tensor:
@@ -56,6 +57,25 @@ def gamma_power(
     return float(gamma), float(lam), used
 
 
+@torch.no_grad()
+def gamma_block(
+    hvp_fn,               # operator or callable: Tensor[D] -> Tensor[D]; a matmat is used when available
+    V: Tensor,            # [D,k], orthonormal basis of S
+):
+    """
+    Closed-form gamma = || P_B H P_S ||_2 = || P_S H P_B ||_2 (H symmetric).
+    Forms H V once as a block (k HVPs), projects to P_B H V, and takes its top
+    singular value via the k x k Gram matrix. No iteration, valid for any k.
+
+    Returns (gamma, lam, hvps_used) with lam = gamma**2, matching gamma_power.
+    """
+    HV = apply_block(hvp_fn, V)
+    PB_HV = HV - V @ (V.t() @ HV)
+    G = (PB_HV.t() @ PB_HV).double()
+    lam = max(float(torch.linalg.eigvalsh(0.5 * (G + G.t())).max()), 0.0)
+    return float(lam ** 0.5), float(lam), int(V.shape[1])
+
+
 @torch.no_grad()
 def principal_angle_max(V_ref: Tensor, V_hat: Tensor) -> float:
     """
@@ -86,6 +106,15 @@ def mu_eff_gamma_k1(mu_S: float, eps: float, gamma: float) -> float:
     return max(val, 0.0)
 
 
+def mu_eff_gamma(mu_S: float, eps: float, gamma: float) -> float:
+    """
+    Same lower bound for any k: with mu_S the smallest curvature on S (the k-th Ritz value),
+    eps the max principal angle and gamma = ||P_S H P_B||, every unit v in the estimated
+    subspace satisfies v^T H v >= mu_S * cos^2(eps) - gamma * sin(2*eps), clipped at 0.
+    """
+    return mu_eff_gamma_k1(mu_S, eps, gamma)
+
+
 def corrected_threshold(eta: float, mu_eff: float) -> float:
     """
     r_th = (eta * mu_eff) / (2 - eta * mu_eff); if eta*mu_eff>=2 -> +inf, if mu_eff<=0 -> +inf
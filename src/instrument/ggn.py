@@ -0,0 +1,82 @@
+from __future__ import annotations
+import torch
+from torch import nn
+from .hvp import HessianOperator, frozen_bn_stats
+from ..utils.precision import autocast
+from ..utils.flatten import flatten_into
+
+class GGNOperator:
+    """
+    Gauss-Newton curvature of mean cross-entropy, G = J^T H_L J / N, as a reusable operator.
+    - kind="ggn":    H_L = diag(p) - p p^T per sample (exact GGN, equals the true Fisher for softmax CE)
+    - kind="fisher": H_L = s s^T with s = onehot(y~) - p, y~ ~ p (one-sample Monte-Carlo Fisher)
+    Both are PSD. The logits graph and the J^T u graph are built once; each matvec costs
+    one JVP (backward through J^T u) plus one VJP (backward through the logits), with no
+    double-backward through the loss. With `autocast_dtype` the logits forward runs under
+    autocast while the softmax Hessian algebra stays fp32.
+    """
+    def __init__(self, model: nn.Module, batch, kind: str = "ggn", seed: int | None = None,
+                 autocast_dtype: torch.dtype | None = None):
+        if kind not in ("ggn", "fisher"):
+            raise ValueError(f"Unknown curvature kind '{kind}'. Choose from ['fisher', 'ggn'].")
+        x, _y = batch
+        self.kind = kind
+        self.params = list(model.parameters())
+        self.dim = sum(p.numel() for p in self.params)
+        with torch.enable_grad(), frozen_bn_stats(model), autocast(x.device, autocast_dtype):
+            self._z = model(x)
+            self._u = torch.zeros_like(self._z, requires_grad=True)
+            jt_u = torch.autograd.grad(self._z, self.params, grad_outputs=self._u, create_graph=True)
+        self._jt_u = torch.cat([g.reshape(-1) for g in jt_u])
+        with torch.no_grad():
+            self._acc_dtype = torch.promote_types(self._z.dtype, torch.float32)
+            self._p = torch.softmax(self._z.detach().to(self._acc_dtype), dim=1)
+            self._s = None
+            if kind == "fisher":
+                g = None
+                if seed is not None:
+                    g = torch.Generator(device=self._p.device); g.manual_seed(seed)
+                y_s = torch.multinomial(self._p, 1, generator=g).squeeze(1)
+                self._s = nn.functional.one_hot(y_s, self._p.shape[1]).to(self._p.dtype) - self._p
+        self.n = self._z.shape[0]
+        self.closed = False
+
+    def _loss_hessian(self, Jv: torch.Tensor) -> torch.Tensor:
+        if self.kind == "fisher":
+            return self._s * (self._s * Jv).sum(dim=1, keepdim=True)
+        return self._p * Jv - self._p * (self._p * Jv).sum(dim=1, keepdim=True)
+
+    supports_out = True
+
+    def matvec(self, v: torch.Tensor, out: torch.Tensor | None = None) -> torch.Tensor:
+        if self.closed:
+            raise RuntimeError("GGNOperator used after close().")
+        Jv, = torch.autograd.grad(self._jt_u, self._u, grad_outputs=v, retain_graph=True)
+        w = (self._loss_hessian(Jv.to(self._acc_dtype)) / self.n).to(self._z.dtype)
+        Gv_parts = torch.autograd.grad(self._z, self.params, grad_outputs=w, retain_graph=True)
+        return flatten_into(Gv_parts, out)
+
+    def matmat(self, V: torch.Tensor) -> torch.Tensor:
+        return torch.stack([self.matvec(V[:, j]) for j in range(V.shape[1])], dim=1)
+
+    __call__ = matvec
+
+    def close(self) -> None:
+        self._z = self._u = self._jt_u = None; self._p = self._s = None
+        self.closed = True
+
+    def __enter__(self): return self
+    def __exit__(self, *args): self.close()
+
+CURVATURES = ("hessian", "ggn", "fisher")
+
+def curvature_operator(curvature: str, model: nn.Module, loss_fn, batch,
+                       backend: str = "autograd", seed: int | None = None,
+                       autocast_dtype: torch.dtype | None = None, hvp_kwargs: dict | None = None):
+    """Hessian (any hvp backend) or cross-entropy GGN / Fisher operator for `batch`."""
+    if curvature == "hessian":
+        return HessianOperator(model, loss_fn, batch, backend=backend, autocast_dtype=autocast_dtype,
+                               hvp_kwargs=hvp_kwargs)
+    if curvature in ("ggn", "fisher"):
+        return GGNOperator(model, batch, kind=curvature, seed=seed, autocast_dtype=autocast_dtype)
+    raise ValueError(f"Unknown curvature '{curvature}'. Choose from {list(CURVATURES)}.")
@@ -0,0 +1,44 @@
+from __future__ import annotations
+import torch
+from .operator import apply_block
+
+def _rademacher(dim: int, n: int, g: torch.Generator, device) -> torch.Tensor:
+    return torch.randint(0, 2, (dim, n), generator=g, device=device).float().mul_(2.0).sub_(1.0)
+
+@torch.no_grad()
+def hutchpp_trace(apply_H, dim: int, V: torch.Tensor | None = None, probes: int = 8, sketch: int = 8,
+                  device: str | torch.device = "cpu", seed: int | None = 0) -> dict:
+    """
+    Hutch++ estimate of tr(H) = tr(V^T H V) + tr(P_B H P_B).
+    The low-rank part uses the given orthonormal V (e.g. the top-k subspace) or, if None,
+    an orthonormalized sketch H·S with `sketch` Gaussian columns; only the deflated remainder
+    P_B H P_B is probed, with `probes` Rademacher vectors applied as one block.
+    Cost: k (or 2*sketch) + probes HVPs. Returns trace, trace_S, trace_B and the standard
+    error of trace_B (trace_B is also the estimate of tr(P_B H)).
+    """
+    g = torch.Generator(device=device)
+    if seed is not None: g.manual_seed(seed)
+    if V is None:
+        S = torch.randn(dim, sketch, generator=g, device=device)
+        V, _ = torch.linalg.qr(apply_block(apply_H, S))
+    trace_S = float((V * apply_block(apply_H, V)).sum())
+    Y = _rademacher(dim, probes, g, device)
+    Y = Y - V @ (V.t() @ Y)
+    per_probe = (Y * apply_block(apply_H, Y)).sum(dim=0)
+    trace_B = float(per_probe.mean())
+    se_B = float(per_probe.std(unbiased=True) / probes ** 0.5) if probes > 1 else float("nan")
+    return {"trace": trace_S + trace_B, "trace_S": trace_S, "trace_B": trace_B, "trace_B_se": se_B}
+
+@torch.no_grad()
+def hutch_diagonal(apply_H, dim: int, probes: int = 8, device: str | torch.device = "cpu",
+                   seed: int | None = 0) -> torch.Tensor:
+    """Bekas et al. diagonal estimate diag(H) ~ mean_i z_i * (H z_i), probes applied as one block."""
+    g = torch.Generator(device=device)
+    if seed is not None: g.manual_seed(seed)
+    Z = _rademacher(dim, probes, g, device)
+    return (Z * apply_block(apply_H, Z)).mean(dim=1)
+
+def diagonal_by_layer(diag: torch.Tensor, groups) -> list[dict]:
+    """Aggregate a diagonal estimate over parameter_groups() blocks: per-layer trace and mean."""
+    return [{"layer": name, "dim": end - start, "diag_sum": float(diag[start:end].sum()),
+             "diag_mean": float(diag[start:end].mean())} for name, start, end, _ in groups]
@@ -1,8 +1,14 @@
 from __future__ import annotations
+from contextlib import contextmanager
+from functools import partial
 import torch
 from torch import nn
+from torch.func import functional_call, grad, jvp, vmap
+from ..utils.precision import autocast
+from ..utils.flatten import add_inplace, clone_params, restore_params, flatten_into
 
-def hvp(loss_fn, model: nn.Module, batch, v: torch.Tensor, create_graph: bool = False) -> torch.Tensor:
+def hvp(loss_fn, model: nn.Module, batch, v: torch.Tensor, create_graph: bool = False,
+        out: torch.Tensor | None = None) -> torch.Tensor:
     loss = loss_fn(model, batch)
     grads = torch.autograd.grad(loss, list(model.parameters()),
                                 create_graph=True, retain_graph=True)
@@ -15,5 +21,215 @@ def hvp(loss_fn, model: nn.Module, batch, v: torch.Tensor, create_graph: bool =
         pointer += numel
     Hv_parts = torch.autograd.grad(grad_dot, list(model.parameters()),
                                    retain_graph=False, create_graph=create_graph)
-    Hv = torch.cat([h.reshape(-1) for h in Hv_parts])
-    return Hv.detach() if not create_graph else Hv
+    if create_graph:
+        return torch.cat([h.reshape(-1) for h in Hv_parts])
+    return flatten_into([h.detach() for h in Hv_parts], out)
+
+@contextmanager
+def frozen_bn_stats(model: nn.Module):
+    """
+    Use batch statistics in train-mode BatchNorm without updating running buffers.
+    Function transforms may not mutate captured buffers in-place.
+    """
+    bns = [m for m in model.modules()
+           if isinstance(m, nn.modules.batchnorm._BatchNorm) and m.training and m.track_running_stats]
+    for m in bns: m.track_running_stats = False
+    try:
+        yield
+    finally:
+        for m in bns: m.track_running_stats = True
+
+def functional_loss(loss_fn, model: nn.Module, batch):
+    """
+    Returns (f, params) with f(params_dict) -> loss, evaluating `model` functionally.
+    `loss_fn(model, batch)` only needs `model` to be callable.
+    """
+    params = {n: p.detach() for n, p in model.named_parameters()}
+    buffers = {n: b for n, b in model.named_buffers()}
+    def f(p):
+        bound = lambda *a, **kw: functional_call(model, (p, buffers), a, kw)
+        return loss_fn(bound, batch)
+    return f, params
+
+def unflatten_like(vec: torch.Tensor, params: dict) -> dict:
+    out = {}; pointer = 0
+    for n, p in params.items():
+        numel = p.numel()
+        out[n] = vec[pointer:pointer+numel].view_as(p); pointer += numel
+    return out
+
+def hvp_fwdrev(loss_fn, model: nn.Module, batch, v: torch.Tensor, create_graph: bool = False,
+               out: torch.Tensor | None = None) -> torch.Tensor:
+    """
+    Forward-over-reverse HVP: jvp of grad through functional_call.
+    No per-parameter Python loop and no retained first-order graph.
+    `create_graph` is accepted for signature compatibility and ignored.
+    """
+    with frozen_bn_stats(model):
+        f, params = functional_loss(loss_fn, model, batch)
+        _, Hv = jvp(grad(f), (params,), (unflatten_like(v, params),))
+    return flatten_into([h.detach() for h in Hv.values()], out)
+
+def hvp_block(loss_fn, model: nn.Module, batch, V: torch.Tensor, method: str = "vmap",
+              chunk_size: int | None = None) -> torch.Tensor:
+    """
+    H @ V for a block V[D,m] in one pass.
+    - method="vmap":  forward-over-reverse vmapped over the m tangents (one forward)
+    - method="graph": one first-order graph reused for m backward sweeps
+    `chunk_size` bounds how many tangents the vmap evaluates at once.
+    """
+    if V.dim() == 1:
+        V = V.unsqueeze(1)
+    if method == "vmap":
+        with frozen_bn_stats(model):
+            f, params = functional_loss(loss_fn, model, batch)
+            g = grad(f)
+            def col(v):
+                _, Hv = jvp(g, (params,), (unflatten_like(v, params),))
+                return torch.cat([h.reshape(-1) for h in Hv.values()])
+            HV = vmap(col, in_dims=1, out_dims=1, chunk_size=chunk_size)(V)
+        return HV.detach()
+    if method == "graph":
+        params = list(model.parameters()); m = V.shape[1]
+        loss = loss_fn(model, batch)
+        grads = torch.autograd.grad(loss, params, create_graph=True)
+        g_flat = torch.cat([g.reshape(-1) for g in grads])
+        cols = []
+        for j in range(m):
+            Hv_parts = torch.autograd.grad(g_flat, params, grad_outputs=V[:, j], retain_graph=j < m - 1)
+            cols.append(torch.cat([h.reshape(-1) for h in Hv_parts]))
+        return torch.stack(cols, dim=1).detach()
+    raise ValueError(f"Unknown hvp_block method '{method}'. Choose from ['graph', 'vmap'].")
+
+def _grad_flat_at(loss_fn, model: nn.Module, batch) -> torch.Tensor:
+    with torch.enable_grad():
+        loss = loss_fn(model, batch)
+        grads = torch.autograd.grad(loss, list(model.parameters()))
+    return torch.cat([g.reshape(-1) for g in grads])
+
+def hvp_fd(loss_fn, model: nn.Module, batch, v: torch.Tensor, create_graph: bool = False,
+           eps: float = 1e-3, richardson: bool = False, out: torch.Tensor | None = None) -> torch.Tensor:
+    """
+    Finite-difference HVP: (g(θ+hv) - g(θ-hv)) / 2h with h = eps/||v||, so only one
+    first-order graph is alive at a time. With `richardson`, combines steps h and h/2
+    as (4 D(h/2) - D(h)) / 3 to cancel the O(h^2) error. θ is restored exactly from a copy.
+    `create_graph` is accepted for signature compatibility and ignored.
+    """
+    theta0 = clone_params(model)
+    h0 = eps / (float(v.norm()) + 1e-12)
+    def central(h: float) -> torch.Tensor:
+        add_inplace(model, v, alpha=h)
+        g_plus = _grad_flat_at(loss_fn, model, batch)
+        restore_params(model, theta0); add_inplace(model, v, alpha=-h)
+        g_minus = _grad_flat_at(loss_fn, model, batch)
+        restore_params(model, theta0)
+        return (g_plus - g_minus) / (2.0 * h)
+    try:
+        with frozen_bn_stats(model):
+            D1 = central(h0)
+            if richardson:
+                D1 = (4.0 * central(0.5 * h0) - D1) / 3.0
+        return D1.detach() if out is None else out.copy_(D1)
+    finally:
+        restore_params(model, theta0)
+
+HVP_BACKENDS = {"autograd": hvp, "fwdrev": hvp_fwdrev,
+                "fd": hvp_fd, "fd_richardson": partial(hvp_fd, richardson=True)}
+
+def get_hvp(backend: str = "autograd", **kwargs):
+    if backend not in HVP_BACKENDS:
+        raise ValueError(f"Unknown hvp backend '{backend}'. Choose from {sorted(HVP_BACKENDS)}.")
+    fn = HVP_BACKENDS[backend]
+    return partial(fn, **kwargs) if kwargs else fn
+
+class HessianOperator:
+    """
+    Hessian of loss_fn(model, batch) at the current parameters, as a reusable operator.
+    With backend="autograd" the forward pass and first-order graph are built once and
+    every matvec is a single backward sweep through it; other backends are called per
+    matvec on the same batch. Parameters must not change while the operator is open.
+    Call close() (or use as a context manager) to release the graph.
+    BatchNorm running stats are not updated by the operator.
+    `autocast_dtype` (e.g. torch.bfloat16) runs the model forward under autocast;
+    parameters, and therefore the returned products, stay fp32.
+    """
+    def __init__(self, model: nn.Module, loss_fn, batch, backend: str = "autograd",
+                 autocast_dtype: torch.dtype | None = None, hvp_kwargs: dict | None = None):
+        self.model, self.loss_fn, self.batch = model, loss_fn, batch
+        self.backend = backend
+        self._hvp = get_hvp(backend, **(hvp_kwargs or {}))
+        self.params = list(model.parameters())
+        self.dim = sum(p.numel() for p in self.params)
+        self._amp = lambda: autocast(self.params[0].device, autocast_dtype)
+        self._g_flat = None; self._grads = None
+        if backend == "autograd":
+            with torch.enable_grad(), frozen_bn_stats(model), self._amp():
+                loss = loss_fn(model, batch)
+                self._grads = torch.autograd.grad(loss, self.params, create_graph=True)
+            self._g_flat = torch.cat([g.reshape(-1) for g in self._grads])
+        self.closed = False
+
+    supports_out = True
+
+    def matvec(self, v: torch.Tensor, out: torch.Tensor | None = None) -> torch.Tensor:
+        if self.closed:
+            raise RuntimeError("HessianOperator used after close().")
+        if self._g_flat is None:
+            with frozen_bn_stats(self.model), self._amp():
+                return self._hvp(self.loss_fn, self.model, self.batch, v, out=out)
+        Hv_parts = torch.autograd.grad(self._g_flat, self.params, grad_outputs=v, retain_graph=True)
+        return flatten_into(Hv_parts, out)
+
+    def matmat(self, V: torch.Tensor) -> torch.Tensor:
+        if self.backend == "fwdrev" and not self.closed:
+            with self._amp():
+                return hvp_block(self.loss_fn, self.model, self.batch, V, method="vmap")
+        return torch.stack([self.matvec(V[:, j]) for j in range(V.shape[1])], dim=1)
+
+    def matvec_params(self, v_b: torch.Tensor, params: list, start: int, end: int,
+                      out: torch.Tensor | None = None) -> torch.Tensor:
+        """H_bb v_b for the parameter block `params` occupying flat coordinates [start, end)."""
+        if self._grads is None:
+            full = torch.zeros(self.dim, dtype=v_b.dtype, device=v_b.device); full[start:end] = v_b
+            Hv_b = self.matvec(full)[start:end]
+            return Hv_b if out is None else out.copy_(Hv_b)
+        if self.closed:
+            raise RuntimeError("HessianOperator used after close().")
+        idx = {id(p): i for i, p in enumerate(self.params)}
+        gs = [self._grads[idx[id(p)]] for p in params]
+        vs = []; pointer = 0
+        for p in params:
+            numel = p.numel(); vs.append(v_b[pointer:pointer+numel].view_as(p)); pointer += numel
+        Hv_parts = torch.autograd.grad(gs, params, grad_outputs=vs, retain_graph=True)
+        return flatten_into(Hv_parts, out)
+
+    __call__ = matvec
+
+    def close(self) -> None:
+        self._g_flat = None; self._grads = None; self.batch = None
+        self.closed = True
+
+    def __enter__(self): return self
+    def __exit__(self, *args): self.close()
+
+class BlockOperator:
+    """
+    Diagonal block H_bb of a curvature operator for one parameter group, acting on
+    vectors of length end - start. Uses the parent's block sweep when it has one,
+    otherwise zero-pads into a full matvec and slices the result.
+    """
+    def __init__(self, op, start: int, end: int, params: list | None = None):
+        self.op, self.start, self.end, self.params = op, start, end, params
+        self.dim = end - start
+
+    supports_out = True
+
+    def matvec(self, v_b: torch.Tensor, out: torch.Tensor | None = None) -> torch.Tensor:
+        fast = getattr(self.op, "matvec_params", None)
+        if fast is not None and self.params is not None:
+            return fast(v_b, self.params, self.start, self.end, out=out)
+        full = torch.zeros(self.op.dim, dtype=v_b.dtype, device=v_b.device); full[self.start:self.end] = v_b
+        Hv_b = self.op.matvec(full)[self.start:self.end]
+        return Hv_b if out is None else out.copy_(Hv_b)
+
+    __call__ = matvec
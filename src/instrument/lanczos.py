@@ -1,28 +1,250 @@
 from __future__ import annotations
 import torch
+from ..utils.workspace import Workspace, matvec_into
+from .operator import apply_block
 
 def topk_power(apply_H, dim: int, k: int = 5, iters: int = 50, tol: float = 1e-5,
-               device: str | torch.device = "cpu", seed: int | None = 42):
+               device: str | torch.device = "cpu", seed: int | None = 42, ws: Workspace | None = None,
+               info: dict | None = None, V0: torch.Tensor | None = None):
+    """
+    Top-k eigenpairs by sequential deflated power iteration. Returns (eigvals[k], V[dim,k]).
+    The basis is built in place in one [k,dim] buffer; products and deflation write into a
+    flat workspace vector (`ws`, reusable across calls), so iterations allocate no D-sized tensors.
+    If `info` is given it is filled with the deflated residuals ||P_j(Hv) - λv|| and matvecs.
+    Warm start: with `V0` [dim,>=1], vector j starts from V0[:,j] plus a 1e-3 random component,
+    and iteration stops once the residual is <= tol * max(1, |λ|).
+    """
     g = torch.Generator(device=device)
     if seed is not None: g.manual_seed(seed)
-    V = []; eigvals = []
+    ws = ws or Workspace()
+    w = ws.get("topk_w", dim, device=device)
+    Vt = torch.empty(k, dim, device=device); eigvals = []; residuals = []; used = 0
     for j in range(k):
-        v = torch.randn(dim, generator=g, device=device)
-        if V:
-            P = torch.stack(V, dim=1); v = v - P @ (P.t() @ v)
-        v = v / (v.norm() + 1e-12)
-        last_val = None
+        v = Vt[j]; P = Vt[:j]
+        v.normal_(generator=g)
+        if V0 is not None and j < V0.shape[1]:
+            v.mul_(1e-3 / max(1.0, dim ** 0.5)).add_(V0[:, j])
+        if j: v.addmv_(P.t(), P @ v, alpha=-1.0)
+        v.div_(v.norm() + 1e-12)
+        last_val = None; fresh = False
         for _ in range(iters):
-            w = apply_H(v)
-            if V: P = torch.stack(V, dim=1); w = w - P @ (P.t() @ w)
+            matvec_into(apply_H, v, w); used += 1
+            if j: w.addmv_(P.t(), P @ w, alpha=-1.0)
             lam = (v @ w).item()
             nrm = w.norm() + 1e-12
-            v_next = w / nrm
-            if last_val is not None and abs(lam - last_val) < tol * max(1.0, abs(lam)): break
-            v = v_next; last_val = lam
-        w = apply_H(v)
-        if V: P = torch.stack(V, dim=1); w = w - P @ (P.t() @ w)
+            if V0 is not None:
+                res = max(float(nrm) ** 2 - lam * lam, 0.0) ** 0.5   # ||w - λv|| for unit v
+                if res <= tol * max(1.0, abs(lam)): fresh = True; break
+            elif last_val is not None and abs(lam - last_val) < tol * max(1.0, abs(lam)): fresh = True; break
+            v.copy_(w).div_(nrm); last_val = lam
+        if not fresh:
+            # w is stale only if the loop ran out; otherwise it already holds P_j(H v)
+            matvec_into(apply_H, v, w); used += 1
+            if j: w.addmv_(P.t(), P @ w, alpha=-1.0)
         lam = (v @ w).item()
-        V.append(v / (v.norm() + 1e-12)); eigvals.append(lam)
-    V = torch.stack(V, dim=1)
-    return torch.tensor(eigvals, device=device), V
+        if info is not None: residuals.append(float(w.add_(v, alpha=-lam).norm()))
+        v.div_(v.norm() + 1e-12); eigvals.append(lam)
+    if info is not None:
+        info.update({"residuals": torch.tensor(residuals), "matvecs": used})
+    return torch.tensor(eigvals, device=device), Vt.t()
+
+def _select(theta: torch.Tensor, which: str) -> torch.Tensor:
+    key = theta.abs() if which == "LM" else theta
+    return torch.argsort(key, descending=True)
+
+def lanczos_topk(apply_H, dim: int, k: int = 5, iters: int = 50, tol: float = 1e-5,
+                 device: str | torch.device = "cpu", seed: int | None = 42, ws: Workspace | None = None,
+                 ncv: int | None = None, which: str = "LM", info: dict | None = None,
+                 V0: torch.Tensor | None = None):
+    """
+    Thick-restart Lanczos with full reorthogonalization. Returns (eigvals[k], V[dim,k]) like
+    topk_power: the k Ritz pairs of largest magnitude (which="LM") or largest value ("LA").
+    - ncv: basis size (default max(2k+1, k+10)); memory is (ncv+1) flat vectors in `ws`
+    - budget: at most iters*k matvecs, i.e. never more than topk_power
+    - converged when every Ritz residual ||H y - θ y|| <= tol * max(1, |θ|_max)
+    If `info` is given it is filled with residuals, matvecs, restarts and converged.
+    Warm start: with `V0` the starting vector is the sum of its columns plus a 1e-3 random component.
+    """
+    g = torch.Generator(device=device)
+    if seed is not None: g.manual_seed(seed)
+    ws = ws or Workspace()
+    k = min(k, dim)
+    m = min(dim, ncv or max(2 * k + 1, k + 10))
+    Q = ws.get("lanczos_Q", (m + 1, dim), device=device)
+    w = ws.get("lanczos_w", dim, device=device)
+    T = torch.zeros(m, m, dtype=torch.float64)
+    Q[0].normal_(generator=g)
+    if V0 is not None:
+        Q[0].mul_(1e-3 * V0.shape[1] ** 0.5 / max(1.0, dim ** 0.5)).add_(V0.sum(dim=1))
+    Q[0].div_(Q[0].norm() + 1e-12)
+    budget = max(1, iters) * k; used = 0; restarts = 0; j0 = 0
+    while True:
+        j_end = min(m, j0 + max(1, budget - used))
+        beta = 0.0
+        for j in range(j0, j_end):
+            matvec_into(apply_H, Q[j], w); used += 1
+            Qj = Q[:j+1]
+            h = Qj @ w; w.addmv_(Qj.t(), h, alpha=-1.0)
+            h2 = Qj @ w; w.addmv_(Qj.t(), h2, alpha=-1.0)   # second pass: full reorthogonalization
+            hc = (h + h2).double().cpu()
+            T[:j+1, j] = hc; T[j, :j+1] = hc
+            beta = float(w.norm())
+            if beta <= 1e-10 * max(1.0, float(hc.abs().max())):
+                # invariant subspace found: continue from a fresh orthogonal direction
+                w.normal_(generator=g)
+                for _ in range(2): w.addmv_(Qj.t(), Qj @ w, alpha=-1.0)
+                Q[j+1].copy_(w).div_(w.norm() + 1e-12); beta = 0.0
+            else:
+                Q[j+1].copy_(w).div_(beta)
+        mm = j_end
+        theta_all, S_all = torch.linalg.eigh(T[:mm, :mm])
+        order = _select(theta_all, which)
+        sel = order[:k]
+        res = beta * S_all[mm-1, sel].abs()
+        theta = theta_all[sel]
+        converged = bool((res <= tol * max(1.0, float(theta.abs().max()))).all())
+        if converged or used >= budget or mm >= dim:
+            break
+        # thick restart: keep the leading Ritz vectors plus the residual direction
+        keep = min(mm - 1, k + (mm - k) // 2)
+        kept = order[:keep]
+        Y = S_all[:, kept].t().to(device=Q.device, dtype=Q.dtype) @ Q[:mm]
+        Q[:keep].copy_(Y); Q[keep].copy_(Q[mm])
+        T.zero_(); T[:keep, :keep] = torch.diag(theta_all[kept])
+        j0 = keep; restarts += 1
+    V = Q[:mm].t() @ S_all[:, sel].to(device=Q.device, dtype=Q.dtype)
+    if info is not None:
+        info.update({"residuals": res.float(), "matvecs": used, "restarts": restarts, "converged": converged})
+    return theta.to(device=device, dtype=torch.float32), V
+
+def _rayleigh_ritz(Z: torch.Tensor, HZ: torch.Tensor, k: int, which: str):
+    """Top-k Ritz values / coefficient vectors of H on span(Z), Z orthonormal; one small dense eigh."""
+    G = (Z.t() @ HZ).double(); G = 0.5 * (G + G.t())
+    theta, S = torch.linalg.eigh(G)
+    sel = _select(theta, which)[:k]
+    return theta[sel].to(Z.dtype), S[:, sel].to(Z.dtype)
+
+def _orth_against(B: torch.Tensor, HB: torch.Tensor | None, Y: torch.Tensor, HY: torch.Tensor | None):
+    C = Y.t() @ B
+    B = B - Y @ C
+    if HB is not None: HB = HB - HY @ C
+    return B, HB
+
+def lobpcg_topk(apply_H, dim: int, k: int = 5, iters: int = 50, tol: float = 1e-5,
+                device: str | torch.device = "cpu", seed: int | None = 42, ws: Workspace | None = None,
+                which: str = "LM", info: dict | None = None, V0: torch.Tensor | None = None,
+                n_extra: int = 2):
+    """
+    Block LOBPCG for the top-k eigenpairs; same signature and returns as topk_power.
+    Each iteration applies H once to the whole D×k residual block (batched via the
+    operator's matmat when available) and solves one dense Rayleigh-Ritz problem on
+    span[X, R, P] (≤3k columns); H·P is carried along linearly, so an iteration costs
+    exactly k products. `iters` bounds block iterations; convergence is on Ritz residuals
+    as in lanczos_topk. `ws` is accepted for signature compatibility.
+    Warm start: with `V0` the block is [V0, n_extra random columns]; the extra columns
+    guard against a stale subspace and only the leading k pairs are checked and returned.
+    """
+    g = torch.Generator(device=device)
+    if seed is not None: g.manual_seed(seed)
+    k_out = k = min(k, dim)
+    X = torch.randn(dim, k, generator=g, device=device)
+    if V0 is not None:
+        k = min(dim, V0.shape[1] + max(0, n_extra))
+        X = torch.cat([V0, torch.randn(dim, k - V0.shape[1], generator=g, device=device)], dim=1)
+    X, _ = torch.linalg.qr(X)
+    HX = apply_block(apply_H, X); used = k
+    theta, C = _rayleigh_ritz(X, HX, k, which)
+    X = X @ C; HX = HX @ C
+    P = HP = None; it = 0
+    for it in range(max(1, iters) + 1):
+        R = HX - X * theta
+        res = R.norm(dim=0)
+        converged = bool((res[:k_out] <= tol * max(1.0, float(theta.abs().max()))).all())
+        if converged or it == max(1, iters) or 2 * k >= dim:
+            break
+        for _ in range(2): R, _ = _orth_against(R, None, X, None)
+        R, _ = torch.linalg.qr(R)
+        HR = apply_block(apply_H, R); used += k
+        blocks, Hblocks = [X, R], [HX, HR]
+        if P is not None and 3 * k <= dim:
+            P, HP = _orth_against(P, HP, X, HX)
+            P, HP = _orth_against(P, HP, R, HR)
+            P, Rp = torch.linalg.qr(P)
+            d = Rp.diagonal().abs()
+            if float(d.min()) > 1e-8 * max(1.0, float(d.max())):
+                HP = torch.linalg.solve_triangular(Rp, HP, upper=True, left=False)
+                blocks.append(P); Hblocks.append(HP)
+        Z = torch.cat(blocks, dim=1); HZ = torch.cat(Hblocks, dim=1)
+        theta, C = _rayleigh_ritz(Z, HZ, k, which)
+        X = Z @ C; HX = HZ @ C
+        P = Z[:, k:] @ C[k:]; HP = HZ[:, k:] @ C[k:]
+    if info is not None:
+        info.update({"residuals": res[:k_out].float(), "matvecs": used, "iterations": it, "converged": converged})
+    return theta[:k_out].to(dtype=torch.float32), X[:, :k_out]
+
+def _cheb_filter(apply_H, X: torch.Tensor, degree: int, c: float, e: float, a0: float) -> torch.Tensor:
+    """
+    p_m(H) X with p_m(λ) = T_m((λ-c)/e) / T_m((a0-c)/e): damps [c-e, c+e], scaled so that
+    p_m(a0) = 1 and the block stays O(1). Scaled three-term recurrence, one block product per degree.
+    """
+    s1 = e / (a0 - c); s = s1
+    Y = (apply_block(apply_H, X) - c * X) * (s1 / e)
+    for _ in range(1, degree):
+        s_new = 1.0 / (2.0 / s1 - s)
+        Y_new = (apply_block(apply_H, Y) - c * Y) * (2.0 * s_new / e) - (s * s_new) * X
+        X, Y, s = Y, Y_new, s_new
+    return Y
+
+def chebyshev_topk(apply_H, dim: int, k: int = 5, iters: int = 50, tol: float = 1e-5,
+                   device: str | torch.device = "cpu", seed: int | None = 42, ws: Workspace | None = None,
+                   which: str = "LM", info: dict | None = None, V0: torch.Tensor | None = None,
+                   degree: int = 8, n_extra: int = 2, upper: float | None = None, lower: float | None = None):
+    """
+    Chebyshev-filtered subspace iteration for the top-k eigenpairs; same signature and
+    returns as topk_power. Each iteration filters a (k + n_extra)-column block with a
+    degree-`degree` Chebyshev polynomial that damps the bulk, then does Rayleigh-Ritz on
+    it, so convergence depends on the filter gap rather than λ_k/λ_{k+1}.
+    - upper: bound on |λ|_max, e.g. from SharpnessTracker (default: max|θ| + max residual
+      of the first Rayleigh-Ritz)
+    - the damped interval ends at the (k + n_extra)-th Ritz value; it is [-cut, cut] for
+      which="LM" and [lower, cut] for "LA" (lower defaults to -upper)
+    - budget: at most iters*k matvecs as in lanczos_topk; convergence on Ritz residuals
+    Warm start: with `V0` the block is [V0, random columns]. `ws` is accepted for signature compatibility.
+    """
+    g = torch.Generator(device=device)
+    if seed is not None: g.manual_seed(seed)
+    k = min(k, dim); p = min(dim, k + max(0, n_extra))
+    X = torch.randn(dim, p, generator=g, device=device)
+    if V0 is not None:
+        n0 = min(p, V0.shape[1]); X[:, :n0] = V0[:, :n0] + 1e-3 * X[:, :n0] / max(1.0, dim ** 0.5)
+    X, _ = torch.linalg.qr(X)
+    HX = apply_block(apply_H, X); used = p
+    theta, C = _rayleigh_ritz(X, HX, p, which)
+    X = X @ C; HX = HX @ C
+    res_all = (HX - X * theta).norm(dim=0)
+    if upper is None:
+        upper = float(theta.abs().max() + res_all.max())
+    upper = max(float(upper), float(theta.abs().max()))
+    budget = max(1, iters) * k; it = 0
+    while True:
+        res = (HX[:, :k] - X[:, :k] * theta[:k]).norm(dim=0)
+        converged = bool((res <= tol * max(1.0, float(theta.abs().max()))).all())
+        if converged or used + (degree + 1) * p > budget or p >= dim:
+            break
+        if which == "LM":
+            cut = float(theta.abs()[-1]); lo = -cut
+        else:
+            cut = float(theta[-1]); lo = -upper if lower is None else float(lower)
+        if not (lo < cut < upper):
+            cut = 0.5 * (lo + upper)
+        c, e = 0.5 * (cut + lo), 0.5 * (cut - lo)
+        X = _cheb_filter(apply_H, X, degree, c, e, upper); used += degree * p
+        X, _ = torch.linalg.qr(X)
+        HX = apply_block(apply_H, X); used += p
+        theta, C = _rayleigh_ritz(X, HX, p, which)
+        X = X @ C; HX = HX @ C; it += 1
+    if info is not None:
+        info.update({"residuals": res.float(), "matvecs": used, "iterations": it, "converged": converged})
+    return theta[:k].to(dtype=torch.float32), X[:, :k]
+
+EIG_SOLVERS = {"power": topk_power, "lanczos": lanczos_topk, "lobpcg": lobpcg_topk, "chebyshev": chebyshev_topk}
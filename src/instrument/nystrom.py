@@ -0,0 +1,62 @@
+from __future__ import annotations
+import math
+import torch
+from .lanczos import _rayleigh_ritz
+from .operator import apply_block
+
+@torch.no_grad()
+def nystrom_topk(apply_H, dim: int, k: int = 5, oversample: int = 10, power_iters: int = 1,
+                 psd: bool = False, err_probes: int = 4, device: str | torch.device = "cpu",
+                 seed: int | None = 42, info: dict | None = None, V0: torch.Tensor | None = None):
+    """
+    Non-iterative randomized top-k from a Gaussian sketch Ω[D, k+oversample].
+    `apply_H` is a per-vector H @ v; blocks go through one matmat when the operator has one.
+    - psd=False: range finder with `power_iters` passes, then Rayleigh-Ritz on the sketch
+      (any symmetric H); cost (power_iters + 1)(k + oversample) products, Ritz residuals are free.
+    - psd=True:  stabilized Nyström approximation (GGN / Fisher); with power_iters=0 a single
+      pass of k + oversample products.
+    A-posteriori bound: with `err_probes` = r > 0 extra products,
+      ||H - V Λ V^T|| <= 10 sqrt(2/π) max_i ||(H - V Λ V^T) ω_i||  with probability >= 1 - 10^-r.
+    Columns of V0 (if given) replace the leading sketch columns. Returns (eigvals[k], V[dim,k]);
+    `info` gets matvecs, residuals (nan for psd) and err_bound.
+    """
+    if power_iters < 1 and not psd:
+        raise ValueError("nystrom_topk needs power_iters >= 1 unless psd=True: Rayleigh-Ritz on an "
+                         "unfiltered random sketch does not approximate the top eigenpairs.")
+    g = torch.Generator(device=device)
+    if seed is not None: g.manual_seed(seed)
+    k = min(k, dim); l = min(dim, k + max(0, oversample))
+    Om = torch.randn(dim, l, generator=g, device=device)
+    if V0 is not None:
+        n0 = min(l, V0.shape[1]); Om[:, :n0] = V0[:, :n0]
+    Q, _ = torch.linalg.qr(Om); used = 0
+    for _ in range(power_iters):
+        Q, _ = torch.linalg.qr(apply_block(apply_H, Q)); used += l
+    Y = apply_block(apply_H, Q); used += l
+    if psd:
+        nu = math.sqrt(dim) * torch.finfo(Y.dtype).eps * float(Y.norm())
+        Y_nu = Y + nu * Q
+        B = Q.t() @ Y_nu; B = 0.5 * (B + B.t())
+        C = torch.linalg.cholesky(B)
+        F = torch.linalg.solve_triangular(C, Y_nu.t(), upper=False).t()
+        U, S, _ = torch.linalg.svd(F, full_matrices=False)
+        lam = (S[:k] ** 2 - nu).clamp_min(0.0); V = U[:, :k]
+        res = torch.full((k,), float("nan"), device=V.device)
+    else:
+        lam, Cr = _rayleigh_ritz(Q, Y, k, "LM")
+        V = Q @ Cr
+        res = (Y @ Cr - V * lam).norm(dim=0)
+    err_bound = float("nan")
+    if err_probes > 0:
+        W = torch.randn(dim, err_probes, generator=g, device=device)
+        E = apply_block(apply_H, W) - V @ (lam.unsqueeze(1) * (V.t() @ W)); used += err_probes
+        err_bound = 10.0 * math.sqrt(2.0 / math.pi) * float(E.norm(dim=0).max())
+    if info is not None:
+        info.update({"residuals": res.float(), "matvecs": used, "err_bound": err_bound})
+    return lam.to(dtype=torch.float32), V
+
+def nystrom_solve(apply_H, dim: int, k: int = 5, iters: int = 50, tol: float = 1e-5,
+                  device: str | torch.device = "cpu", seed: int | None = 42, ws=None,
+                  info: dict | None = None, V0: torch.Tensor | None = None, **kwargs):
+    """nystrom_topk with the EIG_SOLVERS signature; `iters`, `tol` and `ws` are ignored."""
+    return nystrom_topk(apply_H, dim, k=k, device=device, seed=seed, info=info, V0=V0, **kwargs)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+import time
+import torch
+from ..utils.workspace import matvec_into
+
+try:
+    import resource
+except ImportError:  # non-POSIX
+    resource = None
+
+def _peak_mb(device: torch.device) -> float:
+    """
+    Peak allocated CUDA memory since the last reset. On CPU this is the process-lifetime
+    peak RSS (a high-water mark that cannot be reset), so it is only used for run summaries.
+    """
+    if device.type == "cuda":
+        return torch.cuda.max_memory_allocated(device) / 2**20
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # KiB on Linux
+    return float("nan")
+
+def apply_block(apply_H, X: torch.Tensor) -> torch.Tensor:
+    """H @ X for a [D,m] block: one batched matmat when the operator has one, else column by column."""
+    mm = getattr(apply_H, "matmat", None)
+    if mm is not None:
+        return mm(X)
+    return torch.stack([apply_H(X[:, j]) for j in range(X.shape[1])], dim=1)
+
+TELEMETRY_SECTIONS = ("topk", "refresh", "eos", "gamma", "slq", "hutch", "layer", "check")
+
+class OperatorTelemetry:
+    """
+    Per-section matvec counts and wall time for curvature operators. Sections come from
+    TELEMETRY_SECTIONS; fieldnames() lists the metrics.csv columns that step_row() fills for
+    the step before rolling them into run totals; summary() aggregates the run.
+    curv_peak_mb is the per-step CUDA peak, NaN on CPU where no per-step peak exists.
+    """
+    SECTIONS = TELEMETRY_SECTIONS
+
+    @classmethod
+    def fieldnames(cls) -> list[str]:
+        cols = [c for s in cls.SECTIONS for c in (f"mv_{s}", f"sec_{s}")]
+        return cols + ["mv_total", "sec_total", "curv_peak_mb"]
+
+    def __init__(self, device: torch.device | str = "cpu"):
+        self.device = torch.device(device)
+        self._step: dict[str, list] = {}
+        self._run: dict[str, list] = {}
+        self.steps = 0; self.instrumented_steps = 0
+        self.peak_mb = 0.0
+
+    def wrap(self, op, section: str, dim: int | None = None) -> "LinearOperator":
+        if section not in self.SECTIONS:
+            raise ValueError(f"Unknown telemetry section '{section}'. Choose from {list(self.SECTIONS)}.")
+        return LinearOperator(op, section=section, telemetry=self, dim=dim)
+
+    def begin_step(self) -> None:
+        self._step = {}
+        if self.device.type == "cuda":
+            torch.cuda.reset_peak_memory_stats(self.device)
+
+    def record(self, section: str, n: int, seconds: float) -> None:
+        cur = self._step.setdefault(section, [0, 0.0])
+        cur[0] += n; cur[1] += seconds
+
+    def step_row(self) -> dict:
+        row = {}
+        for s in self.SECTIONS:
+            n, t = self._step.get(s, [0, 0.0])
+            row[f"mv_{s}"] = int(n); row[f"sec_{s}"] = float(t)
+        row["mv_total"] = int(sum(n for n, _ in self._step.values()))
+        row["sec_total"] = float(sum(t for _, t in self._step.values()))
+        peak = _peak_mb(self.device) if self._step and self.device.type == "cuda" else float("nan")
+        row["curv_peak_mb"] = float(peak)
+        for s, (n, t) in self._step.items():
+            tot = self._run.setdefault(s, [0, 0.0]); tot[0] += n; tot[1] += t
+        self.steps += 1; self.instrumented_steps += int(bool(self._step))
+        if self._step and self.device.type == "cuda": self.peak_mb = max(self.peak_mb, peak)
+        self._step = {}
+        return row
+
+    def summary(self) -> dict:
+        peak = self.peak_mb if self.device.type == "cuda" else _peak_mb(self.device)  # CPU: lifetime RSS
+        out = {"steps": self.steps, "instrumented_steps": self.instrumented_steps,
+               "peak_mb": peak, "sections": {}}
+        for s, (n, t) in sorted(self._run.items()):
+            out["sections"][s] = {"matvecs": n, "seconds": t,
+                                  "ms_per_matvec": 1e3 * t / max(1, n),
+                                  "matvecs_per_step": n / max(1, self.steps)}
+        out["matvecs"] = sum(n for n, _ in self._run.values())
+        out["seconds"] = sum(t for _, t in self._run.values())
+        return out
+
+class LinearOperator:
+    """
+    Wraps a curvature operator (or any apply_H callable) and reports every matvec, with
+    its wall time, to an OperatorTelemetry section. Supports out= when the wrapped operator does.
+    """
+    supports_out = True
+
+    def __init__(self, op, section: str = "", telemetry: OperatorTelemetry | None = None, dim: int | None = None):
+        self.op, self.section = op, section
+        self.telemetry = telemetry or OperatorTelemetry()
+        self.dim = dim if dim is not None else getattr(op, "dim", None)
+
+    def _timed(self, fn, n: int):
+        t0 = time.perf_counter()
+        y = fn()
+        if self.telemetry.device.type == "cuda":
+            torch.cuda.synchronize(self.telemetry.device)
+        self.telemetry.record(self.section, n, time.perf_counter() - t0)
+        return y
+
+    def matvec(self, v: torch.Tensor, out: torch.Tensor | None = None) -> torch.Tensor:
+        if out is None:
+            return self._timed(lambda: self.op(v), 1)
+        return self._timed(lambda: matvec_into(self.op, v, out), 1)
+
+    def matmat(self, V: torch.Tensor) -> torch.Tensor:
+        return self._timed(lambda: apply_block(self.op, V), V.shape[1])
+
+    __call__ = matvec
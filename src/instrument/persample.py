@@ -0,0 +1,40 @@
+from __future__ import annotations
+from typing import Iterator
+import torch
+from torch import nn
+from torch.func import functional_call, grad, vmap
+from .hvp import frozen_bn_stats
+from ..utils.precision import autocast
+
+def microbatch_grads(loss_fn, model: nn.Module, batch, M: int, chunk_size: int = 4,
+                     amp_dtype: torch.dtype | None = None) -> Iterator[torch.Tensor]:
+    """
+    Yields M flat gradient samples [D] from one batch: the batch is split into M micro-batches
+    of size B // M (remainder dropped) and grad of loss_fn is vmapped over `chunk_size`
+    micro-batches at a time, so peak memory is about chunk_size * D however large M is.
+    Train-mode BatchNorm normalizes each micro-batch with its own statistics and running
+    buffers are not updated, so the functional path is vmap-safe (true per-sample
+    gradients, M = B, would leave BatchNorm a single sample and are not meaningful here).
+    Micro-batch gradients have B/b = M times the covariance of a size-B minibatch gradient;
+    feed them to GradNoiseAccumulator(..., scale=1/M) to estimate minibatch noise.
+    """
+    x, y = batch
+    b = x.shape[0] // M
+    if b < 2:
+        raise ValueError(f"Batch of {x.shape[0]} is too small for {M} micro-batches with BatchNorm.")
+    xs = x[:b*M].reshape(M, b, *x.shape[1:]); ys = y[:b*M].reshape(M, b, *y.shape[1:])
+    params = {n: p.detach() for n, p in model.named_parameters()}
+    buffers = {n: b_ for n, b_ in model.named_buffers()}
+    def f(p, xb, yb):
+        bound = lambda *a, **kw: functional_call(model, (p, buffers), a, kw)
+        with autocast(xb.device, amp_dtype):
+            return loss_fn(bound, (xb, yb))
+    g_fn = vmap(grad(f), in_dims=(None, 0, 0))
+    chunk = max(1, chunk_size)
+    for c0 in range(0, M, chunk):
+        with frozen_bn_stats(model):
+            grads = g_fn(params, xs[c0:c0+chunk], ys[c0:c0+chunk])
+        n = min(chunk, M - c0)
+        G = torch.cat([g.detach().reshape(n, -1) for g in grads.values()], dim=1)
+        del grads
+        yield from G.unbind(0)
@@ -0,0 +1,58 @@
+from __future__ import annotations
+import torch
+from .operator import apply_block
+
+@torch.no_grad()
+def slq_density(apply_H, dim: int, probes: int = 4, depth: int = 20, device: str | torch.device = "cpu",
+                seed: int | None = 0, reorth: bool = False):
+    """
+    Stochastic Lanczos quadrature of the spectral density of H.
+    All Rademacher probes run their Lanczos recurrences together, so each of the `depth`
+    steps is one block product H @ Q[D,probes] (budget: probes * depth HVPs). With
+    `reorth` every probe is fully reorthogonalized (memory: depth * probes flat vectors).
+    Returns (nodes[probes,depth], weights[probes,depth]); each probe's weights sum to 1,
+    so the density is sum_i w_i * delta(x - node_i) / probes and tr(H) ~ dim * mean(sum w * node).
+    """
+    g = torch.Generator(device=device)
+    if seed is not None: g.manual_seed(seed)
+    depth = max(1, min(depth, dim))
+    Z = torch.randint(0, 2, (dim, probes), generator=g, device=device).float().mul_(2.0).sub_(1.0)
+    q = Z / dim ** 0.5
+    q_prev = torch.zeros_like(q); b_prev = torch.zeros(probes, device=device)
+    alphas, betas, basis = [], [], []
+    for j in range(depth):
+        if reorth: basis.append(q)
+        W = apply_block(apply_H, q)
+        a = (q * W).sum(dim=0)
+        W = W - q * a - q_prev * b_prev
+        if reorth:
+            for Qi in basis:
+                W = W - Qi * (Qi * W).sum(dim=0)
+        alphas.append(a)
+        if j == depth - 1:
+            break
+        b = W.norm(dim=0).clamp_min(1e-12)
+        betas.append(b)
+        q_prev, q, b_prev = q, W / b, b
+    A = torch.stack(alphas, dim=1).double().cpu()                      # [probes, depth]
+    B = torch.stack(betas, dim=1).double().cpu() if betas else A[:, :0]
+    T = torch.diag_embed(A) + torch.diag_embed(B, offset=1) + torch.diag_embed(B, offset=-1)
+    nodes, S = torch.linalg.eigh(T)
+    weights = S[:, 0, :] ** 2
+    return nodes.float(), weights.float()
+
+def spectral_histogram(nodes: torch.Tensor, weights: torch.Tensor, bins: int = 30,
+                       lo: float | None = None, hi: float | None = None):
+    """Probe-averaged SLQ density binned on [lo, hi]; returns (edges[bins+1], mass[bins]) summing to 1."""
+    x = nodes.reshape(-1).double(); w = weights.reshape(-1).double() / max(1, nodes.shape[0])
+    lo = float(x.min()) if lo is None else lo
+    hi = float(x.max()) if hi is None else hi
+    if hi <= lo: hi = lo + 1e-12
+    edges = torch.linspace(lo, hi, bins + 1, dtype=torch.float64)
+    idx = torch.bucketize(x, edges[1:-1])
+    mass = torch.zeros(bins, dtype=torch.float64).index_add_(0, idx, w)
+    return edges, mass
+
+def slq_trace(nodes: torch.Tensor, weights: torch.Tensor, dim: int) -> float:
+    """Hutchinson-style trace estimate from the same quadrature: dim * E[z^T H z / ||z||^2]."""
+    return float(dim * (weights * nodes).sum(dim=1).mean())
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from collections import deque
 import torch
 from typing import List
 
@@ -17,6 +18,159 @@ def noise_trace_ps_sigma(grad_flats: List[torch.Tensor], V: torch.Tensor) -> flo
     var = (centered.pow(2).sum(dim=1) / (M - 1.0))
     return float(var.sum().item())
 
+class GradSketch:
+    """
+    Seeded sparse-sign (CountSketch) Johnson-Lindenstrauss projection R^D -> R^s:
+    coordinate d is added with a random sign to a random one of s buckets, so E||S g||^2 = ||g||^2
+    and E tr(S Sigma S^T) = tr(Sigma). Hashes and signs are regenerated chunk by chunk from
+    `seed` on every call instead of being stored, so memory is O(s + chunk) and a projection
+    costs O(D). Hashes are generated on the device of the projected sample.
+    """
+    def __init__(self, dim: int, s: int = 512, seed: int = 0, chunk: int = 1 << 22):
+        self.dim, self.s, self.seed, self.chunk = dim, s, seed, chunk
+
+    def project(self, g: torch.Tensor) -> torch.Tensor:
+        y = torch.zeros(self.s, dtype=g.dtype, device=g.device)
+        gen = torch.Generator(device=g.device)
+        for c, d0 in enumerate(range(0, self.dim, self.chunk)):
+            d1 = min(self.dim, d0 + self.chunk)
+            gen.manual_seed(self.seed * 1_000_003 + c)
+            h = torch.randint(0, self.s, (d1 - d0,), generator=gen, device=g.device)
+            sgn = torch.randint(0, 2, (d1 - d0,), generator=gen, device=g.device).to(g.dtype).mul_(2.0).sub_(1.0)
+            y.index_add_(0, h, g[d0:d1] * sgn)
+        return y
+
+class GradNoiseAccumulator:
+    """
+    Streaming (Welford) gradient-noise statistics: running mean, full covariance trace
+    tr(Sigma) and the k-dim projected coefficients V^T g, updated one sample at a time.
+    Memory is the D-dim mean plus one D-dim temporary, independent of the sample count;
+    trace_ps() equals noise_trace_ps_sigma on the same samples. `scale` multiplies every
+    covariance statistic (not the mean), e.g. 1/M for micro-batch gradient samples.
+    """
+    def __init__(self, V: torch.Tensor, sketch: GradSketch | None = None, scale: float = 1.0):
+        self.V, self.scale = V, scale
+        self.sketch = sketch; self.Y: list[torch.Tensor] = []
+        self.n = 0
+        self.mean: torch.Tensor | None = None
+        self.m2_full = torch.zeros((), dtype=torch.float64, device=V.device)
+        self.mean_c = torch.zeros(V.shape[1], dtype=torch.float64, device=V.device)
+        self.m2_c = torch.zeros(V.shape[1], V.shape[1], dtype=torch.float64, device=V.device)  # scatter of V^T g
+
+    def update(self, g: torch.Tensor) -> None:
+        self.n += 1
+        if self.mean is None:
+            self.mean = g.detach().clone()
+        else:
+            delta = g - self.mean
+            self.mean.add_(delta, alpha=1.0 / self.n)
+            # g - mean_new = (1 - 1/n) delta
+            self.m2_full += (self.scale * (1.0 - 1.0 / self.n)) * (delta @ delta).double()
+        c = (self.V.t() @ g).double()
+        dc = c - self.mean_c
+        self.mean_c += dc / self.n
+        self.m2_c += (self.scale * (1.0 - 1.0 / self.n)) * torch.outer(dc, dc)
+        if self.sketch is not None:
+            self.Y.append(self.sketch.project(g))
+
+    def trace_full(self) -> float:
+        return float(self.m2_full) / max(1.0, self.n - 1.0)
+
+    def _sketch_centered(self) -> torch.Tensor:
+        if self.sketch is None or len(self.Y) < 2:
+            raise ValueError("Need a sketch and at least 2 gradient samples.")
+        Y = torch.stack(self.Y, dim=1).double()   # (s, M)
+        return (Y - Y.mean(dim=1, keepdim=True)) * self.scale ** 0.5
+
+    def trace_sketch(self) -> float:
+        """tr(S Sigma S^T), an unbiased estimate of tr(Sigma) from the s x M sketch."""
+        Yc = self._sketch_centered()
+        return float(Yc.pow(2).sum()) / (Yc.shape[1] - 1.0)
+
+    def spectrum_sketch(self, top: int = 8) -> torch.Tensor:
+        """Leading eigenvalues of the sketched sample covariance (at most M-1 are non-zero)."""
+        Yc = self._sketch_centered()
+        sv = torch.linalg.svdvals(Yc)
+        return (sv[:top] ** 2 / (Yc.shape[1] - 1.0)).float()
+
+    def trace_ps(self) -> float:
+        if self.n < 2:
+            raise ValueError("Need at least 2 gradient samples to estimate covariance trace.")
+        return float(self.m2_c.diagonal().sum()) / (self.n - 1.0)
+
+class NoiseReservoir:
+    """
+    Gradient-noise statistics pooled across steps with exponential decay. Each step adds the
+    within-step scatter of a GradNoiseAccumulator (n samples, n-1 degrees of freedom): the k x k
+    scatter of V^T g, the full-space sum of squares and, with a sketch, the centered s x n
+    sketched samples. Within-step centering keeps the drift of the mean gradient out of the
+    estimate, so two gradients per step (one extra) suffice.
+    Step t has weight w_t = decay^age; full-space traces are sum_t w_t Q_t / sum_t w_t nu_t.
+    rebase(V_new) maps stored scatters with R = V_new^T V_old and tracks A_t = V^T V_t, the map
+    from the subspace entry t was measured in; new direction j retains (A_t A_t^T)_jj = c_tj of
+    it, so trace_ps() normalizes direction by direction:
+        sum_j  sum_t w_t cc_t,jj / sum_t w_t nu_t c_tj.
+    ess(subspace=True) uses the weights w_t * mean_j c_tj that feed trace_ps(); ess() the time
+    weights alone (full-space and sketched statistics). Both are in degrees of freedom,
+    (sum u nu)^2 / sum u^2 nu.
+    """
+    def __init__(self, V: torch.Tensor, decay: float = 0.9, size: int = 64):
+        self.V, self.decay = V, decay
+        self.entries: deque = deque(maxlen=max(1, size))
+
+    def rebase(self, V_new: torch.Tensor) -> None:
+        if V_new is self.V:
+            return
+        R = (V_new.t() @ self.V).double()
+        for e in self.entries:
+            e["cc"] = R @ e["cc"] @ R.t(); e["A"] = R @ e["A"]
+        self.V = V_new
+
+    def add(self, acc: GradNoiseAccumulator) -> None:
+        if acc.n < 2:
+            return
+        for e in self.entries: e["w"] *= self.decay
+        k = acc.m2_c.shape[0]
+        entry = {"w": 1.0, "nu": acc.n - 1.0, "cc": acc.m2_c.clone(), "full": float(acc.m2_full),
+                 "A": torch.eye(k, dtype=torch.float64, device=acc.m2_c.device)}
+        if acc.sketch is not None:
+            entry["Yc"] = acc._sketch_centered()
+        self.entries.append(entry)
+
+    @staticmethod
+    def _cover(e) -> torch.Tensor:
+        return e["A"].pow(2).sum(dim=1)   # diag(A A^T)
+
+    def _pool(self, key) -> float:
+        den = sum(e["w"] * e["nu"] for e in self.entries)
+        return sum(e["w"] * key(e) for e in self.entries) / den if den > 0 else float("nan")
+
+    def trace_ps(self) -> float:
+        if not self.entries:
+            return float("nan")
+        num = sum(e["w"] * e["cc"].diagonal() for e in self.entries)
+        den = sum(e["w"] * e["nu"] * self._cover(e) for e in self.entries)
+        if bool((den <= 1e-12).any()):
+            return float("nan")
+        return float((num / den).sum())
+
+    def trace_full(self) -> float:
+        return self._pool(lambda e: e["full"])
+
+    def trace_sketch(self) -> float:
+        return self._pool(lambda e: float(e["Yc"].pow(2).sum()))
+
+    def spectrum_sketch(self, top: int = 8) -> torch.Tensor:
+        den = sum(e["w"] * e["nu"] for e in self.entries)
+        Y = torch.cat([e["Yc"] * e["w"] ** 0.5 for e in self.entries], dim=1)
+        return (torch.linalg.svdvals(Y)[:top] ** 2 / den).float()
+
+    def ess(self, subspace: bool = False) -> float:
+        u = [e["w"] * (float(self._cover(e).mean()) if subspace else 1.0) for e in self.entries]
+        num = sum(ui * e["nu"] for ui, e in zip(u, self.entries))
+        den = sum(ui * ui * e["nu"] for ui, e in zip(u, self.entries))
+        return num * num / den if den > 0 else 0.0
+
 def r_and_threshold(eta: float, mu: float, signal_sq: float, noise_trace: float) -> tuple[float, float, int]:
     """
     Returns (r, r_th, mask_applicable)
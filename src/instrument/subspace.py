@@ -1,5 +1,6 @@
 from __future__ import annotations
 import torch
+from .operator import apply_block
 
 def projector(V: torch.Tensor):
     def P(x: torch.Tensor) -> torch.Tensor:
@@ -16,3 +17,52 @@ def mix_operator(V: torch.Tensor, dim: int, alpha: float):
     def P_alpha(x: torch.Tensor) -> torch.Tensor:
         return alpha * P_S(x) + (1 - alpha) * P_B(x)
     return P_alpha
+
+class RefreshScheduler:
+    """
+    Decides each step whether the top-k subspace V needs a full re-solve, instead of a fixed
+    eig_freq. check() spends one block product H V and refreshes when
+      - no solve has run yet ("init"),
+      - the relative Ritz residual max_j ||H v_j - θ_j v_j|| / max(1, |θ_1|) exceeds `tol` ("residual"),
+      - ps_grad_sq moved by more than `ps_tol` (relative) since the last refresh ("ps_drift"),
+      - the subspace is `max_age` steps old ("max_age").
+    θ = diag(V^T H V) are the current Rayleigh quotients, kept in `theta` for callers that
+    want fresh eigenvalue estimates between solves. No product is spent before `min_age` steps.
+    """
+    REASONS = ("init", "residual", "ps_drift", "max_age")
+
+    def __init__(self, tol: float = 5e-2, ps_tol: float = 0.0, max_age: int = 0, min_age: int = 1):
+        self.tol, self.ps_tol, self.max_age, self.min_age = tol, ps_tol, max_age, min_age
+        self.age = 0; self.solved = False; self.ps_ref: float | None = None
+        self.residual = float("nan"); self.theta: torch.Tensor | None = None
+        self.reason = ""; self.refreshes = {r: 0 for r in self.REASONS}
+
+    def check(self, apply_H, V: torch.Tensor, ps_grad_sq: float | None = None) -> bool:
+        self.residual = float("nan"); self.theta = None; self.reason = ""
+        if not self.solved:
+            self.reason = "init"
+        elif self.max_age > 0 and self.age >= self.max_age:
+            self.reason = "max_age"
+        elif (self.ps_tol > 0 and ps_grad_sq is not None and self.ps_ref is not None
+              and abs(ps_grad_sq - self.ps_ref) > self.ps_tol * max(abs(self.ps_ref), 1e-12)):
+            self.reason = "ps_drift"
+        elif self.age >= self.min_age:
+            HV = apply_block(apply_H, V)
+            self.theta = (V * HV).sum(dim=0)
+            res = (HV - V * self.theta).norm(dim=0).max()
+            self.residual = float(res) / max(1.0, float(self.theta.abs().max()))
+            if self.residual > self.tol:
+                self.reason = "residual"
+        if self.reason:
+            self.refreshes[self.reason] += 1
+        return bool(self.reason)
+
+    def refreshed(self) -> None:
+        """Record a completed re-solve; the next ps_grad_sq passed to tick() becomes the drift reference."""
+        self.solved = True; self.age = 0; self.ps_ref = None
+
+    def tick(self, ps_grad_sq: float | None = None) -> None:
+        """Advance one step; ps_grad_sq is measured in the current V, so check() sees it one step later."""
+        self.age += 1
+        if self.solved and self.ps_ref is None and ps_grad_sq is not None:
+            self.ps_ref = float(ps_grad_sq)
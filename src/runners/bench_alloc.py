@@ -0,0 +1,81 @@
+from __future__ import annotations
+import argparse
+import torch
+from torch.profiler import profile, ProfilerActivity
+from ..models.resnet_cifar import ResNet18CIFAR
+from ..utils.seed import set_seed
+from ..utils.workspace import Workspace
+from ..instrument.hvp import hvp, HessianOperator
+from ..instrument.lanczos import topk_power
+from ..eos.sharpness import power_max_eig
+from .train_cifar import cross_entropy_loss, flat_dim
+
+def count_allocs(fn, thresholds: list[int], device: torch.device) -> list[int]:
+    """Number of single allocations of at least each of `thresholds` bytes made while running fn()."""
+    acts = [ProfilerActivity.CPU] + ([ProfilerActivity.CUDA] if device.type == "cuda" else [])
+    with profile(activities=acts, profile_memory=True) as prof:
+        fn()
+    counts = [0] * len(thresholds)
+    for e in prof.events():
+        if e.name != "[memory]":
+            continue
+        if device.type == "cuda":
+            nbytes = getattr(e, "device_memory_usage", None) or getattr(e, "cuda_memory_usage", 0)
+        else:
+            nbytes = e.cpu_memory_usage
+        for i, t in enumerate(thresholds):
+            counts[i] += int(nbytes >= t)
+    return counts
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--batch_size", type=int, default=16)
+    ap.add_argument("--num_classes", type=int, default=10)
+    ap.add_argument("--k", type=int, default=2)
+    ap.add_argument("--iters", type=str, default="3,12", help="Comma-separated iteration counts to compare")
+    ap.add_argument("--small_kib", type=float, default=1.0,
+                    help="Lower threshold (KiB) for counting parameter-sized allocations such as per-matvec Hv parts")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--cpu", action="store_true")
+    args = ap.parse_args()
+
+    set_seed(args.seed)
+    device = torch.device("cuda" if torch.cuda.is_available() and not args.cpu else "cpu")
+    model = ResNet18CIFAR(num_classes=args.num_classes).to(device); model.train()
+    batch = (torch.randn(args.batch_size, 3, 32, 32, device=device),
+             torch.randint(0, args.num_classes, (args.batch_size,), device=device))
+    dim = flat_dim(model); min_bytes = dim * 4; small_bytes = int(args.small_kib * 1024)
+    ws = Workspace()
+
+    def step_solves(iters: int, reuse: bool):
+        # tol=0 forces every iteration to run, so the matvec count scales with `iters`
+        if reuse:
+            with HessianOperator(model, cross_entropy_loss, batch) as H:
+                topk_power(H, dim=dim, k=args.k, iters=iters, tol=0.0, device=device, seed=args.seed, ws=ws)
+                power_max_eig(H, dim=dim, iters=iters, tol=0.0, device=device, seed=args.seed, ws=ws)
+        else:
+            apply_H = lambda v: hvp(cross_entropy_loss, model, batch, v)
+            topk_power(apply_H, dim=dim, k=args.k, iters=iters, tol=0.0, device=device, seed=args.seed)
+            power_max_eig(apply_H, dim=dim, iters=iters, tol=0.0, device=device, seed=args.seed)
+
+    iter_list = [int(x) for x in args.iters.split(",")]
+    step_solves(iter_list[0], True)  # warm the workspace
+    counts = {}; small = {}
+    for reuse in (False, True):
+        for it in iter_list:
+            n, n_small = count_allocs(lambda: step_solves(it, reuse), [min_bytes, small_bytes], device)
+            counts[(reuse, it)] = n; small[(reuse, it)] = n_small
+            tag = "workspace" if reuse else "baseline"
+            print(f"[bench_alloc] {tag:>9s} iters={it:3d}: {n} allocations >= {min_bytes/2**20:.1f} MiB, "
+                  f"{n_small} >= {args.small_kib:g} KiB")
+    steady = len({counts[(True, it)] for it in iter_list}) == 1
+    print(f"[bench_alloc] dim={dim} k={args.k} steady-state O(1) flat-vector allocations: {steady}")
+    if len(iter_list) > 1:
+        # per-parameter products (Hv_parts) still come from autograd on every matvec
+        lo, hi = iter_list[0], iter_list[-1]
+        per_mv = (small[(True, hi)] - small[(True, lo)]) / max(1, (hi - lo) * (args.k + 1))
+        print(f"[bench_alloc] workspace: {per_mv:.1f} allocations >= {args.small_kib:g} KiB per additional matvec")
+    return 0 if steady else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
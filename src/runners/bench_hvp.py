@@ -0,0 +1,63 @@
+from __future__ import annotations
+import argparse, time
+import torch
+from ..models.resnet_cifar import ResNet18CIFAR
+from ..utils.seed import set_seed
+from ..instrument.hvp import HVP_BACKENDS, hvp_block
+from .train_cifar import cross_entropy_loss, flat_dim
+
+def _time_backend(fn, model, batch, vs, device) -> tuple[float, list[torch.Tensor]]:
+    fn(cross_entropy_loss, model, batch, vs[0])  # warmup
+    if device.type == "cuda": torch.cuda.synchronize()
+    t0 = time.perf_counter(); outs = []
+    for v in vs:
+        outs.append(fn(cross_entropy_loss, model, batch, v))
+    if device.type == "cuda": torch.cuda.synchronize()
+    return (time.perf_counter() - t0) / len(vs), outs
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--batch_size", type=int, default=64)
+    ap.add_argument("--num_classes", type=int, default=10)
+    ap.add_argument("--reps", type=int, default=5)
+    ap.add_argument("--rtol", type=float, default=1e-3)
+    ap.add_argument("--fd_rtol", type=float, default=5e-2, help="Tolerance for the finite-difference backends")
+    ap.add_argument("--block_m", type=int, default=0, help="If >0, also time hvp_block on a D x m block")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--cpu", action="store_true")
+    args = ap.parse_args()
+
+    set_seed(args.seed)
+    device = torch.device("cuda" if torch.cuda.is_available() and not args.cpu else "cpu")
+    model = ResNet18CIFAR(num_classes=args.num_classes).to(device); model.train()
+    x = torch.randn(args.batch_size, 3, 32, 32, device=device)
+    y = torch.randint(0, args.num_classes, (args.batch_size,), device=device)
+    batch = (x, y); dim = flat_dim(model)
+    vs = [torch.randn(dim, device=device) for _ in range(args.reps)]
+    vs = [v / v.norm() for v in vs]
+
+    results = {name: _time_backend(fn, model, batch, vs, device) for name, fn in HVP_BACKENDS.items()}
+    t_ref, ref = results["autograd"]
+    ok = True
+    for name, (t, outs) in results.items():
+        rel = max(float((o - r).norm() / (r.norm() + 1e-12)) for o, r in zip(outs, ref))
+        ok = ok and rel <= (args.fd_rtol if name.startswith("fd") else args.rtol)
+        print(f"[bench_hvp] {name:>13s}: {1e3*t:8.2f} ms/call  speedup={t_ref/max(t,1e-12):5.2f}x  max_rel_err={rel:.2e}")
+    if args.block_m > 0:
+        Vb = torch.linalg.qr(torch.randn(dim, args.block_m, device=device))[0]
+        ref_b = torch.stack([HVP_BACKENDS["autograd"](cross_entropy_loss, model, batch, Vb[:, j]) for j in range(args.block_m)], dim=1)
+        for method in ("vmap", "graph"):
+            hvp_block(cross_entropy_loss, model, batch, Vb, method=method)  # warmup
+            if device.type == "cuda": torch.cuda.synchronize()
+            t0 = time.perf_counter()
+            HV = hvp_block(cross_entropy_loss, model, batch, Vb, method=method)
+            if device.type == "cuda": torch.cuda.synchronize()
+            t = time.perf_counter() - t0
+            rel = float((HV - ref_b).norm() / (ref_b.norm() + 1e-12))
+            ok = ok and rel <= args.rtol
+            print(f"[bench_hvp] block_{method:>5s}: {1e3*t/args.block_m:8.2f} ms/col  speedup={t_ref*args.block_m/max(t,1e-12):5.2f}x  rel_err={rel:.2e}")
+    print(f"[bench_hvp] dim={dim} batch={args.batch_size} device={device} match(rtol={args.rtol:g})={ok}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import argparse, json, time
+import torch
+from ..models.resnet_cifar import ResNet18CIFAR
+from ..utils.seed import set_seed
+from ..utils.precision import autocast_dtype, PRECISIONS
+from ..instrument.hvp import HVP_BACKENDS
+from ..instrument.ggn import curvature_operator, CURVATURES
+from ..eos.sharpness import power_max_eig
+from .train_cifar import cross_entropy_loss, flat_dim, _get_grad_flat, _delta_loss_after_step
+
+def _rel(a: torch.Tensor, b: torch.Tensor) -> float:
+    return float((a - b).norm() / (b.norm() + 1e-12))
+
+def drift_report(model, batch, precision: str, curvature: str = "hessian", backend: str = "autograd",
+                 reps: int = 4, power_iters: int = 20, lr: float = 0.1, seed: int = 0) -> dict:
+    """Numeric drift of the `precision` instrumentation path against fp32 on one batch."""
+    dt = autocast_dtype(precision); device = batch[0].device; dim = flat_dim(model)
+    g = torch.Generator(device=device); g.manual_seed(seed)
+    vs = [torch.randn(dim, generator=g, device=device) for _ in range(reps)]
+    out = {"precision": precision, "curvature": curvature, "dim": dim}
+    runs = {}  # "ref" is the fp32 reference, "cmp" the compared precision (may also be fp32)
+    for tag, d in (("ref", None), ("cmp", dt)):
+        t0 = time.perf_counter()
+        with curvature_operator(curvature, model, cross_entropy_loss, batch, backend=backend, seed=seed, autocast_dtype=d) as H:
+            Hvs = [H(v) for v in vs]
+            lam, _ = power_max_eig(H, dim=dim, iters=power_iters, tol=1e-4, device=device, seed=seed)
+        runs[tag] = (Hvs, float(lam), time.perf_counter() - t0)
+    (hv_ref, lam_ref, t_ref), (hv_cmp, lam_cmp, t_cmp) = runs["ref"], runs["cmp"]
+    out["lambda_max_fp32"] = lam_ref; out[f"lambda_max_{precision}"] = lam_cmp
+    out["hvp_max_rel_err"] = max(_rel(a, b) for a, b in zip(hv_cmp, hv_ref))
+    out["lambda_max_rel_err"] = abs(lam_cmp - lam_ref) / max(abs(lam_ref), 1e-12)
+    g32 = _get_grad_flat(model, batch, cross_entropy_loss)
+    glo = _get_grad_flat(model, batch, cross_entropy_loss, dt)
+    model.zero_grad(set_to_none=True)
+    out["grad_rel_err"] = _rel(glo, g32)
+    out["grad_cos"] = float(glo @ g32 / (glo.norm() * g32.norm() + 1e-12))
+    dL32 = _delta_loss_after_step(model, cross_entropy_loss, batch, -lr * g32)
+    dLlo = _delta_loss_after_step(model, cross_entropy_loss, batch, -lr * g32, dt)
+    out["deltaL_fp32"] = dL32; out[f"deltaL_{precision}"] = dLlo
+    out["deltaL_abs_err"] = abs(dLlo - dL32)
+    out["seconds_fp32"] = t_ref; out[f"seconds_{precision}"] = t_cmp
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--precision", type=str, default="bf16", choices=sorted(PRECISIONS))
+    ap.add_argument("--curvature", type=str, default="hessian", choices=list(CURVATURES))
+    ap.add_argument("--hvp_backend", type=str, default="autograd", choices=sorted(HVP_BACKENDS))
+    ap.add_argument("--batch_size", type=int, default=64)
+    ap.add_argument("--num_classes", type=int, default=10)
+    ap.add_argument("--reps", type=int, default=4)
+    ap.add_argument("--lr", type=float, default=0.1)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=str, default="", help="Optional JSON output path")
+    ap.add_argument("--cpu", action="store_true")
+    args = ap.parse_args()
+
+    set_seed(args.seed)
+    device = torch.device("cuda" if torch.cuda.is_available() and not args.cpu else "cpu")
+    model = ResNet18CIFAR(num_classes=args.num_classes).to(device); model.train()
+    batch = (torch.randn(args.batch_size, 3, 32, 32, device=device),
+             torch.randint(0, args.num_classes, (args.batch_size,), device=device))
+    rep = drift_report(model, batch, args.precision, args.curvature, args.hvp_backend,
+                       reps=args.reps, lr=args.lr, seed=args.seed)
+    for k, v in rep.items():
+        print(f"[precision_drift] {k}={v:.4g}" if isinstance(v, float) else f"[precision_drift] {k}={v}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(rep, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
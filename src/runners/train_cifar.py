@@ -1,21 +1,32 @@
 from __future__ import annotations
 import argparse, os, time, math, json, csv
 from collections import deque
+from functools import partial
 import torch
 from torch import nn, optim
 from torch.utils.data import DataLoader
 from ..datasets.cifar10 import get_cifar10_loaders
 from ..datasets.cifar100 import get_cifar100_loaders
 from ..datasets.tiny_imagenet import get_tiny_imagenet_loaders
+from ..datasets.aux_stream import AuxBatchStream
 from ..models.resnet_cifar import ResNet18CIFAR
 from ..utils.seed import set_seed
 from ..utils.io import CSVLogger
-from ..utils.flatten import grads_to_vector, add_inplace
-from ..instrument.hvp import hvp
-from ..instrument.lanczos import topk_power
-from ..instrument.snr import noise_trace_ps_sigma, r_and_threshold
-from ..instrument.gamma import gamma_power, principal_angle_max, mu_eff_gamma_k1, corrected_threshold
-from ..eos.sharpness import power_max_eig
+from ..utils.flatten import grads_to_vector, add_inplace, parameter_groups, clone_params, restore_params
+from ..utils.precision import autocast, autocast_dtype, PRECISIONS
+from ..utils.workspace import Workspace
+from ..instrument.hvp import HVP_BACKENDS, BlockOperator
+from ..instrument.ggn import curvature_operator, CURVATURES
+from ..instrument.operator import OperatorTelemetry
+from ..instrument.lanczos import EIG_SOLVERS
+from ..instrument.nystrom import nystrom_solve
+from ..instrument.slq import slq_density, spectral_histogram, slq_trace
+from ..instrument.hutch import hutchpp_trace, hutch_diagonal, diagonal_by_layer
+from ..instrument.persample import microbatch_grads
+from ..instrument.snr import noise_trace_ps_sigma, r_and_threshold, GradNoiseAccumulator, GradSketch, NoiseReservoir
+from ..instrument.subspace import RefreshScheduler
+from ..instrument.gamma import gamma_power, gamma_block, principal_angle_max, mu_eff_gamma, corrected_threshold
+from ..eos.sharpness import power_max_eig, SharpnessTracker
 
 def cross_entropy_loss(model: nn.Module, batch: tuple) -> torch.Tensor:
     x, y = batch
@@ -34,46 +45,50 @@ def accuracy(model: nn.Module, loader: DataLoader, device: torch.device) -> floa
 def flat_dim(model: nn.Module) -> int:
     return sum(p.numel() for p in model.parameters())
 
-def _get_grad_flat(model, batch, loss_fn):
+def _get_grad_flat(model, batch, loss_fn, amp_dtype: torch.dtype | None = None):
     model.zero_grad(set_to_none=True)
-    loss = loss_fn(model, batch); loss.backward()
+    with autocast(batch[0].device, amp_dtype):
+        loss = loss_fn(model, batch)
+    loss.backward()
     from ..utils.flatten import grads_to_vector
     return grads_to_vector(model.parameters()).detach()
 
-def _clone_params(model: nn.Module) -> torch.Tensor:
-    with torch.no_grad():
-        return torch.cat([p.detach().reshape(-1).clone() for p in model.parameters()])
-
-def _restore_params(model: nn.Module, vec: torch.Tensor) -> None:
-    with torch.no_grad():
-        pointer = 0
-        for p in model.parameters():
-            numel = p.numel()
-            p.data.copy_(vec[pointer:pointer+numel].view_as(p)); pointer += numel
-
-def _delta_loss_after_step(model, loss_fn, batch, delta_vec: torch.Tensor) -> float:
+def _delta_loss_after_step(model, loss_fn, batch, delta_vec: torch.Tensor, amp_dtype: torch.dtype | None = None) -> float:
     from ..utils.flatten import add_inplace
     was_training = model.training
     model.eval()
-    with torch.no_grad():
-        theta0 = _clone_params(model)
+    with torch.no_grad(), autocast(delta_vec.device, amp_dtype):
+        theta0 = clone_params(model)
         add_inplace(model, delta_vec, alpha=1.0)
         L1 = float(loss_fn(model, batch).item())
-        _restore_params(model, theta0)
+        restore_params(model, theta0)
         L0 = float(loss_fn(model, batch).item())
     if was_training:
         model.train()
     return L1 - L0
 
-def eval_delta_multi_batch(model, loss_fn, base_batch, delta_vec: torch.Tensor, loader: DataLoader, M: int, device):
-    deltas = [ _delta_loss_after_step(model, loss_fn, base_batch, delta_vec) ]
+def curvature_subbatch(batch, size: int = 0, frac: float = 1.0, seed: int = 0):
+    """Random sub-batch of `batch` for curvature solves: fixed `size` if >0, else `frac` of it."""
+    x, y = batch; n = x.shape[0]
+    m = size if size > 0 else int(round(frac * n))
+    m = max(1, min(n, m))
+    if m >= n:
+        return batch
+    g = torch.Generator().manual_seed(seed)
+    idx = torch.randperm(n, generator=g)[:m].to(x.device)
+    return x.index_select(0, idx), y.index_select(0, idx)
+
+def eval_delta_multi_batch(model, loss_fn, base_batch, delta_vec: torch.Tensor, loader, M: int, device,
+                           amp_dtype: torch.dtype | None = None):
+    """ΔL averaged over base_batch and M-1 batches from `loader` (a DataLoader or a list of batches)."""
+    deltas = [ _delta_loss_after_step(model, loss_fn, base_batch, delta_vec, amp_dtype) ]
     it = iter(loader)
     for _ in range(max(0, M-1)):
         try: xb, yb = next(it)
         except StopIteration:
             it = iter(loader); xb, yb = next(it)
         xb, yb = xb.to(device), yb.to(device)
-        deltas.append(_delta_loss_after_step(model, loss_fn, (xb, yb), delta_vec))
+        deltas.append(_delta_loss_after_step(model, loss_fn, (xb, yb), delta_vec, amp_dtype))
     return float(sum(deltas)/len(deltas))
 
 def compute_best_c_scale(records, c_grid):
@@ -107,6 +122,18 @@ def main():
     ap.add_argument("--k", type=int, default=8)
     ap.add_argument("--eig_freq", type=int, default=200)
     ap.add_argument("--noise_M", type=int, default=8)
+    ap.add_argument("--noise_source", type=str, default="loader", choices=["loader", "microbatch"],
+                    help="loader: noise_M-1 extra minibatch gradients; microbatch: noise_M micro-batch gradients of the current batch, vmapped --noise_chunk at a time")
+    ap.add_argument("--aux_stream", action="store_true", help="Draw noise and ΔL batches from one persistent auxiliary loader instead of a fresh iter(train_loader) per use")
+    ap.add_argument("--aux_workers", type=int, default=-1, help="Workers for --aux_stream (default: --workers)")
+    ap.add_argument("--aux_prefetch", type=int, default=2, help="Batches kept prefetched on device by --aux_stream")
+    ap.add_argument("--aux_log", action="store_true", help="Log the dataset indices of every auxiliary batch to aux_batches.jsonl")
+    ap.add_argument("--noise_sketch", type=int, default=0, help="If >0, also project each gradient sample with a seeded s-dim sparse JL sketch and log tr(Sigma) and its top eigenvalues from it")
+    ap.add_argument("--noise_sketch_top", type=int, default=8, help="Sketched gradient-noise eigenvalues logged per step")
+    ap.add_argument("--noise_reservoir", action="store_true", help="Pool noise statistics across steps (exponentially weighted) instead of per-step estimates; use with a small --noise_M, e.g. 2")
+    ap.add_argument("--reservoir_decay", type=float, default=0.9, help="Per-step weight decay of --noise_reservoir entries")
+    ap.add_argument("--reservoir_size", type=int, default=64, help="Steps kept by --noise_reservoir")
+    ap.add_argument("--noise_chunk", type=int, default=4, help="Micro-batches per vmapped pass for --noise_source microbatch (peak memory ~ chunk x D)")
     ap.add_argument("--ema", type=float, default=0.9)
     ap.add_argument("--seed", type=int, default=123)
     ap.add_argument("--logdir", type=str, default="results")
@@ -127,10 +154,49 @@ def main():
     ap.add_argument("--use_gamma_correction", action="store_true")
     ap.add_argument("--gamma_freq", type=int, default=0)
     ap.add_argument("--gamma_iters", type=int, default=20)
+    ap.add_argument("--gamma_method", type=str, default="power", choices=["power","block"],
+                    help="gamma estimator: power iteration (k=1 only) or closed-form block SVD (any k, k HVPs)")
+    ap.add_argument("--hvp_backend", type=str, default="autograd", choices=sorted(HVP_BACKENDS),
+                    help="Hessian-vector product backend: double-backward (autograd) or torch.func jvp-of-grad (fwdrev)")
+    ap.add_argument("--curv_batch_size", type=int, default=0, help="If >0, estimate curvature on a random sub-batch of this size")
+    ap.add_argument("--curv_batch_frac", type=float, default=1.0, help="Fraction of the batch used for curvature when --curv_batch_size is 0")
+    ap.add_argument("--curv_check_freq", type=int, default=0, help="If >0 and curvature is sub-sampled, compare mu/lambda_max to the full batch every N steps")
+    ap.add_argument("--fd_eps", type=float, default=1e-3, help="Parameter-space step norm for the finite-difference hvp backends")
+    ap.add_argument("--precision", type=str, default="fp32", choices=sorted(PRECISIONS),
+                    help="Autocast dtype for HVP, noise-gradient and ΔL forwards (solver algebra stays fp32)")
+    ap.add_argument("--layer_freq", type=int, default=0, help="If >0, log per-layer top eigenvalues and r every N steps")
+    ap.add_argument("--layer_k", type=int, default=1, help="Eigenpairs per parameter block in the per-layer diagnostics")
+    ap.add_argument("--layer_depth", type=int, default=2, help="Parameter-name depth used to group parameters into layers")
+    ap.add_argument("--eig_solver", type=str, default="power", choices=sorted(EIG_SOLVERS) + ["nystrom"],
+                    help="Top-k eigensolver: deflated power iteration, thick-restart Lanczos, LOBPCG, Chebyshev-filtered subspace iteration or randomized Nystrom sketch")
+    ap.add_argument("--nystrom_oversample", type=int, default=10, help="Extra sketch columns for --eig_solver nystrom")
+    ap.add_argument("--nystrom_power", type=int, default=1, help="Power passes for --eig_solver nystrom (0 = single pass, PSD curvatures only)")
+    ap.add_argument("--cheb_degree", type=int, default=8, help="Chebyshev filter degree for --eig_solver chebyshev")
+    ap.add_argument("--warm_start", action="store_true", help="Seed each top-k solve from the previous subspace V")
+    ap.add_argument("--warm_tol", type=float, default=1e-2, help="Relative Ritz-residual tolerance for warm-started --eig_solver power solves (other solvers use the cold 1e-3)")
+    ap.add_argument("--eig_refresh", type=str, default="fixed", choices=["fixed", "adaptive"],
+                    help="fixed: re-solve top-k every eig_freq steps; adaptive: re-solve when the subspace goes stale")
+    ap.add_argument("--refresh_tol", type=float, default=5e-2, help="Relative Ritz-residual ||HV - V theta|| that triggers an adaptive re-solve")
+    ap.add_argument("--refresh_ps_tol", type=float, default=0.0, help="If >0, also re-solve when ps_grad_sq drifts by this relative amount")
+    ap.add_argument("--refresh_max_age", type=int, default=0, help="If >0, re-solve at least every N steps in adaptive mode")
+    ap.add_argument("--eos_track", action="store_true", help="Track lambda_max incrementally instead of a fresh power solve every step")
+    ap.add_argument("--eos_refine_iters", type=int, default=2, help="Warm power iterations per step for --eos_track")
+    ap.add_argument("--eos_tol", type=float, default=1e-2, help="Relative Rayleigh-residual tolerance before --eos_track falls back to a full solve")
+    ap.add_argument("--slq_freq", type=int, default=0, help="If >0, estimate the curvature spectral density (SLQ) every N steps")
+    ap.add_argument("--slq_probes", type=int, default=4, help="Rademacher probes per SLQ estimate (run as one block)")
+    ap.add_argument("--slq_depth", type=int, default=20, help="Lanczos depth per SLQ probe; budget is probes*depth HVPs")
+    ap.add_argument("--slq_bins", type=int, default=30)
+    ap.add_argument("--hutch_freq", type=int, default=0, help="If >0, estimate tr(H) and tr(P_B H) with Hutch++ (V as low-rank part) every N steps")
+    ap.add_argument("--hutch_probes", type=int, default=8, help="Rademacher probes on the deflated remainder (one block)")
+    ap.add_argument("--hutch_diag_probes", type=int, default=0, help="If >0, also estimate diag(H) with this many probes, aggregated per layer")
+    ap.add_argument("--curvature", type=str, default="hessian", choices=list(CURVATURES),
+                    help="Curvature operator for eigen/EoS/gamma solves: Hessian, or PSD cross-entropy GGN / MC Fisher")
     # sliding c* re-selection
     ap.add_argument("--cstar_update_every", type=int, default=0, help="If >0, re-select c* every N steps using a sliding window")
     ap.add_argument("--cstar_window", type=int, default=80, help="Sliding window length (in steps) for c* re-selection")
     args = ap.parse_args()
+    if args.eig_solver == "nystrom" and args.nystrom_power < 1 and args.curvature == "hessian":
+        ap.error("--nystrom_power 0 (single pass) needs a PSD curvature: use --curvature ggn/fisher or --nystrom_power >= 1")
 
     set_seed(args.seed)
     device = torch.device("cuda" if torch.cuda.is_available() and not args.cpu else "cpu")
@@ -145,21 +211,47 @@ def main():
         train_loader, test_loader = get_tiny_imagenet_loaders(args.data, args.batch_size, args.workers, aug=True)
         num_classes = 200
     model = ResNet18CIFAR(num_classes=num_classes).to(device)
+    aux = None
+    if args.aux_stream:
+        aux = AuxBatchStream(train_loader.dataset, args.batch_size,
+                             num_workers=args.workers if args.aux_workers < 0 else args.aux_workers,
+                             seed=args.seed + 1, prefetch=args.aux_prefetch, device=device)
+    amp_dtype = autocast_dtype(args.precision)
+    hvp_kwargs = {"eps": args.fd_eps} if args.hvp_backend.startswith("fd") else None
     opt = optim.SGD(model.parameters(), lr=args.lr, momentum=args.momentum, weight_decay=args.wd)
 
     run_dir = os.path.join(args.logdir, time.strftime("%Y%m%d-%H%M%S")); os.makedirs(run_dir, exist_ok=True)
     logger = CSVLogger(os.path.join(run_dir, "metrics.csv"),
         fieldnames=[
             "step","epoch","batch","loss","acc",
-            "r","r_th","r_th_eff","mu",
-            "ps_grad_sq","tr_ps_sigma",
-            "grad_norm_sq","tr_sigma_full",
+            "r","noise_ess","noise_ess_full","r_th","r_th_eff","mu","eig_res_max","eig_err_bound","eig_refresh","refresh_reason","subspace_res",
+            "ps_grad_sq","tr_ps_sigma","tr_ps_sigma_step",
+            "grad_norm_sq","tr_sigma_full","tr_sigma_sketch",
             "deltaL_dom","deltaL_bulk","deltaL_full",
-            "lambda_max","two_over_lr","trigger","cstar","mask_applicable",
-            "r_th_gamma_eff","eps_current","gamma_val","gamma_iters_used","gamma_ok"
+            "lambda_max","eos_residual","eos_full","slq_trace","trace_H","trace_PB_H","trace_PB_H_se","two_over_lr","trigger","cstar","mask_applicable",
+            "r_th_gamma_eff","eps_current","gamma_val","gamma_iters_used","gamma_ok",
+            "curv_batch","mu_full","lambda_max_full","mu_sub_relerr","lam_sub_relerr","mu_sub_rms","lam_sub_rms",
+            *OperatorTelemetry.fieldnames()
         ])
 
     dim = flat_dim(model)
+    ws = Workspace()  # flat scratch vectors reused by every eigen/EoS solve
+    if args.eig_solver == "nystrom":
+        topk_solve = partial(nystrom_solve, oversample=args.nystrom_oversample, power_iters=args.nystrom_power,
+                             psd=args.curvature != "hessian")
+    else:
+        topk_solve = EIG_SOLVERS[args.eig_solver]
+    eos_tracker = SharpnessTracker(dim, refine_iters=args.eos_refine_iters, tol=args.eos_tol, full_iters=30,
+                                   full_tol=1e-3, device=device, seed=args.seed+42) if args.eos_track else None
+    refresh = RefreshScheduler(tol=args.refresh_tol, ps_tol=args.refresh_ps_tol,
+                               max_age=args.refresh_max_age) if args.eig_refresh == "adaptive" else None
+    noise_sketch = GradSketch(dim, s=args.noise_sketch, seed=args.seed + 7) if args.noise_sketch > 0 else None
+    telemetry = OperatorTelemetry(device)  # matvec counts / time per solve, logged per step
+    layer_groups = parameter_groups(model, depth=args.layer_depth) if args.layer_freq > 0 else []
+    layer_logger = None
+    if layer_groups:
+        layer_logger = CSVLogger(os.path.join(run_dir, "layer_metrics.csv"),
+            fieldnames=["step","layer","dim","lambda_top","mu","ps_grad_sq","tr_ps_sigma","r","r_th","mask_applicable"])
     # init V random orthonormal
     V = torch.randn(dim, args.k, device=device)
     for j in range(args.k):
@@ -167,6 +259,7 @@ def main():
         for i in range(j):
             v = v - (V[:,i] @ v) * V[:,i]
         V[:,j] = v / (v.norm() + 1e-12)
+    reservoir = NoiseReservoir(V, decay=args.reservoir_decay, size=args.reservoir_size) if args.noise_reservoir else None
     mu = 0.0; step = 0; ema_r = None
     V_prev = None
     eps_current = 0.0
@@ -177,6 +270,12 @@ def main():
     cstar_buffer: deque = deque(maxlen=max(1, args.cstar_window))
     c_grid = [float(x) for x in args.c_grid.split(",")] if args.c_grid else [1.0]
 
+    # online RMS of the relative change in mu / lambda_max caused by curvature sub-sampling
+    curv_err_sq = {"mu": [0.0, 0], "lam": [0.0, 0]}
+    def _curv_rms(key):
+        tot, n = curv_err_sq[key]
+        return (tot / n) ** 0.5 if n > 0 else float("nan")
+
     def current_rth_scale():
         if args.auto_rth_scale and cstar is not None: return cstar
         return args.rth_scale
@@ -186,10 +285,47 @@ def main():
         for batch_idx, (x, y) in enumerate(train_loader):
             x, y = x.to(device), y.to(device); batch = (x, y)
 
-            if args.eig_freq > 0 and step % args.eig_freq == 0:
-                def apply_H(v_flat: torch.Tensor) -> torch.Tensor:
-                    return hvp(cross_entropy_loss, model, batch, v_flat, create_graph=False)
-                eigvals, V = topk_power(apply_H, dim=dim, k=args.k, iters=50, tol=1e-3, device=device, seed=args.seed+step)
+            # one curvature operator per step, shared by top-k, gamma and EoS solves
+            telemetry.begin_step()
+            do_eig = args.eig_freq > 0 and step % args.eig_freq == 0 and refresh is None
+            do_gamma = (args.use_gamma_correction and (args.k == 1 or args.gamma_method == "block")
+                        and args.gamma_freq>0 and (step % args.gamma_freq == 0))
+            do_eos = not args.skip_eos and args.eig_freq>0
+            do_layer = bool(layer_groups) and step % args.layer_freq == 0
+            do_slq = args.slq_freq > 0 and step % args.slq_freq == 0
+            do_hutch = args.hutch_freq > 0 and step % args.hutch_freq == 0
+            H_op = None; curv_batch = batch; eig_res_max = eig_err_bound = float("nan")
+            refresh_reason = ""; subspace_res = float("nan")
+            if do_eig or do_gamma or do_eos or do_layer or do_slq or do_hutch or refresh is not None:
+                curv_batch = curvature_subbatch(batch, args.curv_batch_size, args.curv_batch_frac, seed=args.seed+step)
+                H_op = curvature_operator(args.curvature, model, cross_entropy_loss, curv_batch,
+                                          backend=args.hvp_backend, seed=args.seed+step, autocast_dtype=amp_dtype, hvp_kwargs=hvp_kwargs)
+            if refresh is not None:
+                do_eig = refresh.check(telemetry.wrap(H_op, "refresh"), V, ps_grad_sq if step > 0 else None)
+                refresh_reason, subspace_res = refresh.reason, refresh.residual
+                if not do_eig and refresh.theta is not None:
+                    # current Rayleigh quotients of the kept subspace, k-th in the solvers' magnitude order
+                    theta_lm = refresh.theta[torch.argsort(refresh.theta.abs(), descending=True)]
+                    mu = float(theta_lm[min(args.k-1, len(theta_lm)-1)].item())
+
+            if do_eig:
+                eig_info = {}
+                warm = args.warm_start and V_prev is not None
+                solve_kwargs = {}
+                if args.eig_solver == "chebyshev":
+                    # upper spectral bound for the filter from the previous step's lambda_max
+                    solve_kwargs["degree"] = args.cheb_degree
+                    if eos_tracker is not None and math.isfinite(eos_tracker.lam):
+                        solve_kwargs["upper"] = 1.1 * abs(eos_tracker.lam)
+                # only the power solver switches to a Ritz-residual stop when warm; others keep the cold tol
+                tol = args.warm_tol if warm and args.eig_solver == "power" else 1e-3
+                eigvals, V = topk_solve(telemetry.wrap(H_op, "topk"), dim=dim, k=args.k, iters=50,
+                                        tol=tol, device=device, seed=args.seed+step,
+                                        ws=ws, info=eig_info, V0=V_prev if warm else None, **solve_kwargs)
+                eig_res_max = float(eig_info["residuals"].max().item())
+                eig_err_bound = float(eig_info.get("err_bound", float("nan")))
+                if eos_tracker is not None:
+                    eos_tracker.seed(V[:, 0])
                 mu = float(eigvals[min(args.k-1, len(eigvals)-1)].item())
                 # track previous subspace for angle
                 if V_prev is None:
@@ -197,46 +333,22 @@ def main():
                 else:
                     eps_current = principal_angle_max(V_prev, V)
                 V_prev = V.clone()
+                if refresh is not None:
+                    refresh.refreshed()
 
-            # gradient & signal
-            model.zero_grad(set_to_none=True)
-            loss = cross_entropy_loss(model, batch); loss.backward()
-            from ..utils.flatten import grads_to_vector
-            grad_flat = grads_to_vector(model.parameters()).detach()
-            coeffs = V.t() @ grad_flat; ps_grad_sq = float((coeffs*coeffs).sum().item())
-
-            # noise trace (subspace) and full covariance trace
-            grad_samples = [grad_flat]; it = iter(train_loader)
-            for _ in range(args.noise_M - 1):
-                try: xb, yb = next(it)
-                except StopIteration:
-                    it = iter(train_loader); xb, yb = next(it)
-                xb, yb = xb.to(device), yb.to(device)
-                g = _get_grad_flat(model, (xb, yb), cross_entropy_loss); grad_samples.append(g)
-            tr_ps_sigma = float(noise_trace_ps_sigma(grad_samples, V))
-            # full covariance trace = sum of variances across all dims
-            G = torch.stack(grad_samples, dim=1)  # (dim, M)
-            M = G.shape[1]
-            meanG = G.mean(dim=1, keepdim=True)
-            centeredG = G - meanG
-            varG = (centeredG.pow(2).sum(dim=1) / max(1.0, (M - 1.0)))
-            tr_sigma_full = float(varG.sum().item())
-            grad_norm_sq = float(grad_flat.pow(2).sum().item())
-
-            r, r_th, mask_app = r_and_threshold(args.lr, mu, ps_grad_sq, tr_ps_sigma)
             r_th_gamma_eff = float('nan')
             gamma_val_log = float('nan')
             gamma_iters_used_log = 0
             gamma_ok_log = 0
-            if args.use_gamma_correction and args.k == 1 and args.gamma_freq>0 and (step % args.gamma_freq == 0):
-                def apply_H_for_gamma(v_flat: torch.Tensor) -> torch.Tensor:
-                    # Use create_graph=True to enable stable second-order hvp where needed
-                    return hvp(cross_entropy_loss, model, batch, v_flat, create_graph=True)
+            if do_gamma:
                 try:
-                    gamma_val, _lam_t, _it = gamma_power(apply_H_for_gamma, V, iters=args.gamma_iters, tol=1e-4, device=device)
+                    if args.gamma_method == "block":
+                        gamma_val, _lam_t, _it = gamma_block(telemetry.wrap(H_op, "gamma"), V)
+                    else:
+                        gamma_val, _lam_t, _it = gamma_power(telemetry.wrap(H_op, "gamma"), V, iters=args.gamma_iters, tol=1e-4, device=device)
                     # reuse the epsilon measured just before updating V_prev
                     eps_val = max(0.0, min(math.pi/2, float(eps_current)))
-                    mu_eff = mu_eff_gamma_k1(max(0.0, mu), eps_val, gamma_val)
+                    mu_eff = mu_eff_gamma(max(0.0, mu), eps_val, gamma_val)
                     r_th_gamma_eff = corrected_threshold(args.lr, mu_eff)
                     gamma_val_log = float(gamma_val)
                     gamma_iters_used_log = int(_it)
@@ -245,9 +357,135 @@ def main():
                     r_th_gamma_eff = float('nan')
                     try:
                         with open(os.path.join(run_dir, "gamma_errors.log"), "a", encoding="utf-8") as ef:
-                            ef.write(f"step={step} seed={args.seed} dataset={args.dataset} exception on gamma_power: {repr(e)}\n")
+                            ef.write(f"step={step} seed={args.seed} dataset={args.dataset} exception on gamma_{args.gamma_method}: {repr(e)}\n")
                     except Exception:
                         pass
+            # EoS (before ΔL so the operator can be released before parameters are perturbed)
+            eos_residual, eos_full = float("nan"), 0
+            if do_eos and eos_tracker is not None:
+                lam_max = eos_tracker.update(telemetry.wrap(H_op, "eos"), ws=ws)
+                eos_residual, eos_full = eos_tracker.residual, int(eos_tracker.used_full)
+                two_over_lr = 2.0 / args.lr
+            elif do_eos:
+                lam_max, _ = power_max_eig(telemetry.wrap(H_op, "eos"), dim=dim, iters=30, tol=1e-3, device=device, seed=args.seed+42, ws=ws)
+                two_over_lr = 2.0 / args.lr
+            else:
+                lam_max, two_over_lr = float("nan"), float("nan")
+            # spectral density (SLQ) on the same operator, one block product per Lanczos step
+            slq_tr = float("nan")
+            if do_slq:
+                nodes, weights = slq_density(telemetry.wrap(H_op, "slq"), dim, probes=args.slq_probes,
+                                             depth=args.slq_depth, device=device, seed=args.seed+step)
+                edges, mass = spectral_histogram(nodes, weights, bins=args.slq_bins)
+                slq_tr = slq_trace(nodes, weights, dim)
+                with open(os.path.join(run_dir, "slq_density.jsonl"), "a", encoding="utf-8") as sf:
+                    sf.write(json.dumps({"step": step, "edges": [round(float(e), 6) for e in edges],
+                                         "mass": [round(float(m_), 6) for m_ in mass], "trace": slq_tr}) + "\n")
+            # Hutch++ trace with V as the low-rank part; optional per-layer diagonal
+            hutch = {"trace": float("nan"), "trace_B": float("nan"), "trace_B_se": float("nan")}
+            if do_hutch:
+                hutch = hutchpp_trace(telemetry.wrap(H_op, "hutch"), dim, V=V, probes=args.hutch_probes,
+                                      device=device, seed=args.seed+step)
+                if args.hutch_diag_probes > 0:
+                    diag = hutch_diagonal(telemetry.wrap(H_op, "hutch"), dim, probes=args.hutch_diag_probes,
+                                          device=device, seed=args.seed+step+1)
+                    diag_path = os.path.join(run_dir, "layer_diag.csv")
+                    diag_exists = os.path.isfile(diag_path)
+                    with open(diag_path, "a", encoding="utf-8", newline="") as df:
+                        writer = csv.DictWriter(df, fieldnames=["step","layer","dim","diag_sum","diag_mean"])
+                        if not diag_exists:
+                            writer.writeheader()
+                        for row in diagonal_by_layer(diag, parameter_groups(model, depth=args.layer_depth)):
+                            writer.writerow({"step": step, **row})
+            # per-layer sharpness on the diagonal Hessian blocks H_bb (r follows once gradients exist)
+            layer_solves = []
+            if do_layer:
+                for li, (lname, l0, l1, lparams) in enumerate(layer_groups):
+                    blk = telemetry.wrap(BlockOperator(H_op, l0, l1, lparams), "layer")
+                    lk = min(args.layer_k, blk.dim)
+                    ev_b, V_b = topk_solve(blk, dim=blk.dim, k=lk, iters=50, tol=1e-3, device=device, seed=args.seed+step+li)
+                    layer_solves.append((lname, l0, l1, ev_b, V_b))
+            # release the curvature graph before any gradient / noise backward pass
+            if H_op is not None:
+                H_op.close(); H_op = None
+
+            # periodic full-batch reference for sub-sampled curvature
+            mu_full = lam_max_full = mu_sub_relerr = lam_sub_relerr = float("nan")
+            curv_subsampled = curv_batch[0].shape[0] < batch[0].shape[0]
+            if curv_subsampled and args.curv_check_freq > 0 and step % args.curv_check_freq == 0 and (do_eig or do_eos):
+                with curvature_operator(args.curvature, model, cross_entropy_loss, batch,
+                                        backend=args.hvp_backend, seed=args.seed+step, autocast_dtype=amp_dtype, hvp_kwargs=hvp_kwargs) as H_full:
+                    if do_eig:
+                        ev_full, _ = topk_solve(telemetry.wrap(H_full, "check"), dim=dim, k=args.k, iters=50, tol=1e-3, device=device, seed=args.seed+step, ws=ws)
+                        mu_full = float(ev_full[min(args.k-1, len(ev_full)-1)].item())
+                        mu_sub_relerr = (mu - mu_full) / max(abs(mu_full), 1e-12)
+                        curv_err_sq["mu"][0] += mu_sub_relerr ** 2; curv_err_sq["mu"][1] += 1
+                    if do_eos:
+                        lam_max_full, _ = power_max_eig(telemetry.wrap(H_full, "check"), dim=dim, iters=30, tol=1e-3, device=device, seed=args.seed+42, ws=ws)
+                        lam_sub_relerr = (lam_max - lam_max_full) / max(abs(lam_max_full), 1e-12)
+                        curv_err_sq["lam"][0] += lam_sub_relerr ** 2; curv_err_sq["lam"][1] += 1
+
+            # gradient & signal
+            model.zero_grad(set_to_none=True)
+            with autocast(device, amp_dtype):
+                loss = cross_entropy_loss(model, batch)
+            loss.backward()
+            from ..utils.flatten import grads_to_vector
+            grad_flat = grads_to_vector(model.parameters()).detach()
+            coeffs = V.t() @ grad_flat; ps_grad_sq = float((coeffs*coeffs).sum().item())
+            if refresh is not None:
+                refresh.tick(ps_grad_sq)
+
+            # noise trace (subspace) and full covariance trace, streamed sample by sample;
+            # samples are kept only for the per-layer diagnostics
+            # micro-batch samples carry M times the minibatch noise covariance
+            noise_scale = 1.0 / args.noise_M if args.noise_source == "microbatch" else 1.0
+            noise = GradNoiseAccumulator(V, sketch=noise_sketch, scale=noise_scale); grad_samples = []
+            def _add_sample(g):
+                noise.update(g)
+                if do_layer: grad_samples.append(g)
+            if args.noise_source == "microbatch":
+                for g in microbatch_grads(cross_entropy_loss, model, batch, args.noise_M,
+                                          chunk_size=args.noise_chunk, amp_dtype=amp_dtype):
+                    _add_sample(g)
+            else:
+                _add_sample(grad_flat)
+                if aux is not None:
+                    for xb, yb in aux.take(args.noise_M - 1, tag="noise"):
+                        _add_sample(_get_grad_flat(model, (xb, yb), cross_entropy_loss, amp_dtype))
+                else:
+                    it = iter(train_loader)
+                    for _ in range(args.noise_M - 1):
+                        try: xb, yb = next(it)
+                        except StopIteration:
+                            it = iter(train_loader); xb, yb = next(it)
+                        xb, yb = xb.to(device), yb.to(device)
+                        _add_sample(_get_grad_flat(model, (xb, yb), cross_entropy_loss, amp_dtype))
+            tr_ps_sigma_step = noise.trace_ps()
+            noise_est, noise_ess = noise, float(noise.n - 1); noise_ess_full = noise_ess
+            if reservoir is not None:
+                # cross-step pool; stored coefficients follow a refreshed V
+                reservoir.rebase(V); reservoir.add(noise)
+                noise_est, noise_ess, noise_ess_full = reservoir, reservoir.ess(subspace=True), reservoir.ess()
+            tr_ps_sigma = noise_est.trace_ps()
+            tr_sigma_full = noise_est.trace_full()
+            tr_sigma_sketch = float("nan")
+            if noise_sketch is not None and noise.n >= 2:
+                tr_sigma_sketch = noise_est.trace_sketch()
+                with open(os.path.join(run_dir, "noise_spectrum.jsonl"), "a", encoding="utf-8") as nf:
+                    nf.write(json.dumps({"step": step, "trace": tr_sigma_sketch,
+                                         "eigvals": [float(e) for e in noise_est.spectrum_sketch(args.noise_sketch_top)]}) + "\n")
+            grad_norm_sq = float(grad_flat.pow(2).sum().item())
+
+            r, r_th, mask_app = r_and_threshold(args.lr, mu, ps_grad_sq, tr_ps_sigma)
+            for lname, l0, l1, ev_b, V_b in layer_solves:
+                cb = V_b.t() @ grad_flat[l0:l1]; ps_b = float((cb*cb).sum().item())
+                tr_b = noise_scale * float(noise_trace_ps_sigma([g[l0:l1] for g in grad_samples], V_b))
+                mu_b = float(ev_b[-1].item())
+                r_b, r_th_b, mask_b = r_and_threshold(args.lr, mu_b, ps_b, tr_b)
+                layer_logger.log({"step": step, "layer": lname, "dim": l1 - l0, "lambda_top": float(ev_b[0].item()),
+                                  "mu": mu_b, "ps_grad_sq": ps_b, "tr_ps_sigma": tr_b,
+                                  "r": float(r_b), "r_th": float(r_th_b), "mask_applicable": int(mask_b)})
             if ema_r is None: ema_r = r
             else: ema_r = args.ema * ema_r + (1 - args.ema) * r
 
@@ -267,9 +505,11 @@ def main():
                 delta_bulk = -args.lr * P_B(g_cur)
                 delta_full = -args.lr * g_cur
                 evalM = max(1, args.eval_M)
-                deltaL_dom  = eval_delta_multi_batch(model, cross_entropy_loss, batch, delta_dom,  train_loader, evalM, device)
-                deltaL_bulk = eval_delta_multi_batch(model, cross_entropy_loss, batch, delta_bulk, train_loader, evalM, device)
-                deltaL_full = eval_delta_multi_batch(model, cross_entropy_loss, batch, delta_full,  train_loader, evalM, device)
+                # with --aux_stream the three ΔL use the same auxiliary batches
+                eval_src = aux.take(evalM - 1, tag="eval") if aux is not None else train_loader
+                deltaL_dom  = eval_delta_multi_batch(model, cross_entropy_loss, batch, delta_dom,  eval_src, evalM, device, amp_dtype)
+                deltaL_bulk = eval_delta_multi_batch(model, cross_entropy_loss, batch, delta_bulk, eval_src, evalM, device, amp_dtype)
+                deltaL_full = eval_delta_multi_batch(model, cross_entropy_loss, batch, delta_full,  eval_src, evalM, device, amp_dtype)
             else:
                 deltaL_dom = float("nan"); deltaL_bulk = float("nan"); deltaL_full = float("nan")
 
@@ -303,22 +543,19 @@ def main():
                         writer.writerow(row)
                     print(f"[Auto r_th scale:update] step={step} c*={cstar:.3g} F1={best['f1']:.3f}")
 
-            # EoS
-            if not args.skip_eos and args.eig_freq>0:
-                lam_max, _ = power_max_eig(lambda v: hvp(cross_entropy_loss, model, batch, v),
-                                           dim=dim, iters=30, tol=1e-3, device=device, seed=args.seed+42)
-                two_over_lr = 2.0 / args.lr
-            else:
-                lam_max, two_over_lr = float("nan"), float("nan")
-
             logger.log({
                 "step": step, "epoch": epoch, "batch": batch_idx,
                 "loss": float(loss.item()), "acc": float(-1.0),
-                "r": float(ema_r), "r_th": float(r_th), "r_th_eff": float(r_th_eff), "mu": float(mu),
-                "ps_grad_sq": float(ps_grad_sq), "tr_ps_sigma": float(tr_ps_sigma),
-                "grad_norm_sq": float(grad_norm_sq), "tr_sigma_full": float(tr_sigma_full),
+                "r": float(ema_r), "noise_ess": float(noise_ess), "noise_ess_full": float(noise_ess_full), "r_th": float(r_th), "r_th_eff": float(r_th_eff), "mu": float(mu),
+                "eig_res_max": float(eig_res_max), "eig_err_bound": float(eig_err_bound),
+                "eig_refresh": int(do_eig), "refresh_reason": refresh_reason, "subspace_res": float(subspace_res),
+                "ps_grad_sq": float(ps_grad_sq), "tr_ps_sigma": float(tr_ps_sigma), "tr_ps_sigma_step": float(tr_ps_sigma_step),
+                "grad_norm_sq": float(grad_norm_sq), "tr_sigma_full": float(tr_sigma_full), "tr_sigma_sketch": float(tr_sigma_sketch),
                 "deltaL_dom": float(deltaL_dom), "deltaL_bulk": float(deltaL_bulk), "deltaL_full": float(deltaL_full),
-                "lambda_max": float(lam_max), "two_over_lr": float(two_over_lr), "trigger": int(trigger),
+                "lambda_max": float(lam_max), "eos_residual": float(eos_residual), "eos_full": int(eos_full),
+                "slq_trace": float(slq_tr),
+                "trace_H": float(hutch["trace"]), "trace_PB_H": float(hutch["trace_B"]), "trace_PB_H_se": float(hutch["trace_B_se"]),
+                "two_over_lr": float(two_over_lr), "trigger": int(trigger),
                 "cstar": float(cstar if cstar is not None else float("nan")),
                 "mask_applicable": int(mask_app),
                 # gamma correction diagnostics
@@ -327,8 +564,21 @@ def main():
                 "gamma_val": float(gamma_val_log),
                 "gamma_iters_used": int(gamma_iters_used_log),
                 "gamma_ok": int(gamma_ok_log),
+                # curvature sub-sampling diagnostics
+                "curv_batch": int(curv_batch[0].shape[0]),
+                "mu_full": float(mu_full), "lambda_max_full": float(lam_max_full),
+                "mu_sub_relerr": float(mu_sub_relerr), "lam_sub_relerr": float(lam_sub_relerr),
+                "mu_sub_rms": float(_curv_rms("mu")), "lam_sub_rms": float(_curv_rms("lam")),
+                # curvature matvec telemetry
+                **telemetry.step_row(),
             })
 
+            if aux is not None:
+                aux_log = aux.drain_log()
+                if args.aux_log and aux_log:
+                    with open(os.path.join(run_dir, "aux_batches.jsonl"), "a", encoding="utf-8") as af:
+                        af.write(json.dumps({"step": step, "batches": aux_log}) + "\n")
+
             # train step
             opt.zero_grad(set_to_none=True)
             loss = cross_entropy_loss(model, batch); loss.backward(); opt.step()
@@ -341,5 +591,10 @@ def main():
             print(f"[epoch {epoch}] test acc={acc:.4f}  (logs: {run_dir})")
         if args.max_steps > 0 and step >= args.max_steps: break
 
+    tel_summary = telemetry.summary()
+    with open(os.path.join(run_dir, "telemetry_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(tel_summary, f, indent=2)
+    print(f"[telemetry] matvecs={tel_summary['matvecs']} seconds={tel_summary['seconds']:.1f} peak_mb={tel_summary['peak_mb']:.0f}")
+
 if __name__ == "__main__":
     main()
@@ -13,6 +13,16 @@ def vector_to_parameters(vec: torch.Tensor, params: Iterable[torch.Tensor]) -> N
         p.data.copy_(vec[pointer:pointer+numel].view_as(p))
         pointer += numel
 
+def flatten_into(parts: Iterable[torch.Tensor], out: torch.Tensor | None = None) -> torch.Tensor:
+    """Concatenate flattened `parts`; writes into the preallocated flat `out` when given."""
+    if out is None:
+        return torch.cat([t.reshape(-1) for t in parts])
+    pointer = 0
+    for t in parts:
+        numel = t.numel()
+        out[pointer:pointer+numel].copy_(t.reshape(-1)); pointer += numel
+    return out
+
 def grads_to_vector(params: Iterable[torch.Tensor]) -> torch.Tensor:
     grads = []
     for p in params:
@@ -22,9 +32,38 @@ def grads_to_vector(params: Iterable[torch.Tensor]) -> torch.Tensor:
             grads.append(p.grad.reshape(-1))
     return torch.cat(grads)
 
+def clone_params(model: nn.Module) -> torch.Tensor:
+    with torch.no_grad():
+        return torch.cat([p.detach().reshape(-1).clone() for p in model.parameters()])
+
+def restore_params(model: nn.Module, vec: torch.Tensor) -> None:
+    with torch.no_grad():
+        pointer = 0
+        for p in model.parameters():
+            numel = p.numel()
+            p.data.copy_(vec[pointer:pointer+numel].view_as(p)); pointer += numel
+
 def add_inplace(model: nn.Module, delta: torch.Tensor, alpha: float = 1.0) -> None:
     pointer = 0
     for p in model.parameters():
         numel = p.numel()
         p.data.add_(alpha * delta[pointer:pointer+numel].view_as(p))
         pointer += numel
+
+def parameter_groups(model: nn.Module, depth: int = 2) -> list[tuple[str, int, int, list[torch.Tensor]]]:
+    """
+    Contiguous flat-vector blocks of `model.parameters()`, grouped by the first `depth`
+    components of the parameter name. Returns [(name, start, end, params), ...].
+    """
+    groups: list[tuple[str, int, int, list[torch.Tensor]]] = []
+    pointer = 0
+    for n, p in model.named_parameters():
+        key = ".".join(n.split(".")[:depth])
+        numel = p.numel()
+        if groups and groups[-1][0] == key:
+            name, start, _end, ps = groups[-1]
+            groups[-1] = (name, start, pointer + numel, ps + [p])
+        else:
+            groups.append((key, pointer, pointer + numel, [p]))
+        pointer += numel
+    return groups
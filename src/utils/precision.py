@@ -0,0 +1,17 @@
+from __future__ import annotations
+from contextlib import nullcontext
+import torch
+
+PRECISIONS = {"fp32": None, "bf16": torch.bfloat16}
+
+def autocast_dtype(precision: str) -> torch.dtype | None:
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}'. Choose from {sorted(PRECISIONS)}.")
+    return PRECISIONS[precision]
+
+def autocast(device: torch.device | str, dtype: torch.dtype | None):
+    """autocast(dtype) on `device`; a no-op context when dtype is None (fp32 path)."""
+    if dtype is None:
+        return nullcontext()
+    device_type = torch.device(device).type
+    return torch.autocast(device_type=device_type, dtype=dtype)
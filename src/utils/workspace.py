@@ -0,0 +1,29 @@
+from __future__ import annotations
+import torch
+
+class Workspace:
+    """
+    Named scratch buffers reused across calls. get() returns the same storage for a name
+    as long as shape, dtype and device match, so steady-state solves allocate nothing large.
+    Buffers are scratch: callers must not keep references past the next get() of that name.
+    """
+    def __init__(self):
+        self._bufs: dict[str, torch.Tensor] = {}
+    def get(self, name: str, shape, dtype=torch.float32, device="cpu") -> torch.Tensor:
+        shape = torch.Size(shape if isinstance(shape, (tuple, list, torch.Size)) else (shape,))
+        device = torch.device(device)
+        if device.type == "cuda" and device.index is None:
+            # allocated buffers report an explicit index ("cuda:0"); compare like with like
+            device = torch.device("cuda", torch.cuda.current_device())
+        buf = self._bufs.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype or buf.device != device:
+            buf = torch.empty(shape, dtype=dtype, device=device); self._bufs[name] = buf
+        return buf
+    def clear(self) -> None:
+        self._bufs.clear()
+
+def matvec_into(apply_H, v: torch.Tensor, out: torch.Tensor) -> torch.Tensor:
+    """apply_H(v) written into `out`; operators with `supports_out` write there directly."""
+    if getattr(apply_H, "supports_out", False):
+        return apply_H(v, out=out)
+    return out.copy_(apply_H(v))
@@ -0,0 +1,96 @@
+import pytest
+import torch
+from src.instrument.lanczos import topk_power, lanczos_topk
+def _sym_matrix(D=60, seed=0):
+    g = torch.Generator().manual_seed(seed)
+    Q, _ = torch.linalg.qr(torch.randn(D, D, generator=g, dtype=torch.float64))
+    evals = torch.cat([torch.tensor([50.0, -30.0, 20.0, 12.0], dtype=torch.float64),
+                       torch.linspace(-1.0, 1.0, D - 4, dtype=torch.float64)])
+    return ((Q * evals) @ Q.t()).float(), evals
+class Counter:
+    def __init__(self, A): self.A, self.n = A, 0
+    def __call__(self, v): self.n += 1; return self.A @ v
+def test_lanczos_topk_matches_dense_and_beats_power():
+    A, evals = _sym_matrix()
+    ref = evals[torch.argsort(evals.abs(), descending=True)][:4].float()
+    info = {}
+    H_l = Counter(A); lam_l, V_l = lanczos_topk(H_l, dim=60, k=4, iters=50, tol=1e-5, info=info)
+    assert torch.allclose(lam_l, ref, atol=1e-3)
+    assert info["converged"] and float(info["residuals"].max()) < 1e-3
+    assert torch.allclose(V_l.t() @ V_l, torch.eye(4), atol=1e-4)
+    assert float((A @ V_l - V_l * lam_l).norm(dim=0).max()) < 1e-2
+    H_p = Counter(A); lam_p, _ = topk_power(H_p, dim=60, k=4, iters=50, tol=1e-5)
+    assert H_l.n < H_p.n
+def test_lobpcg_topk_matches_dense():
+    from src.instrument.lanczos import lobpcg_topk
+    A, evals = _sym_matrix(seed=1)
+    ref = evals[torch.argsort(evals.abs(), descending=True)][:4].float()
+    info = {}
+    lam, V = lobpcg_topk(lambda v: A @ v, dim=60, k=4, iters=50, tol=1e-5, info=info)
+    assert torch.allclose(lam, ref, atol=1e-3)
+    assert float(info["residuals"].max()) < 1e-2
+    assert torch.allclose(V.t() @ V, torch.eye(4), atol=1e-4)
+def test_warm_start_converges_in_few_products():
+    from src.instrument.lanczos import lobpcg_topk
+    A, evals = _sym_matrix(seed=2)
+    _, V = lanczos_topk(lambda v: A @ v, dim=60, k=3, iters=50, tol=1e-6)
+    for solver in (topk_power, lanczos_topk, lobpcg_topk):
+        cold, warm = Counter(A), Counter(A)
+        solver(cold, dim=60, k=3, iters=50, tol=1e-3)
+        lam, _ = solver(warm, dim=60, k=3, iters=50, tol=1e-3, V0=V)
+        ref = evals[torch.argsort(evals.abs(), descending=True)][:3].float()
+        assert torch.allclose(lam, ref, atol=1e-2)
+        assert warm.n <= cold.n
+def test_sharpness_tracker_refines_and_falls_back():
+    from src.eos.sharpness import SharpnessTracker
+    A, evals = _sym_matrix(seed=3)
+    tr = SharpnessTracker(60, refine_iters=2, tol=1e-3, full_iters=200, full_tol=1e-7)
+    H = Counter(A)
+    lam = tr.update(H)
+    assert tr.used_full and abs(lam - 50.0) < 1e-2
+    n0 = H.n; lam = tr.update(H)
+    assert not tr.used_full and H.n - n0 == 1 and abs(lam - 50.0) < 1e-2
+    tr.seed(torch.randn(60))
+    tr.update(H)
+    assert tr.full_solves >= 1 and abs(tr.lam - 50.0) < 1e-2
+def test_refresh_scheduler_triggers_on_stale_subspace():
+    from src.instrument.subspace import RefreshScheduler
+    A, _ = _sym_matrix(seed=4)
+    _, V = lanczos_topk(lambda v: A @ v, dim=60, k=3, iters=50, tol=1e-6)
+    sch = RefreshScheduler(tol=1e-2, ps_tol=0.5)
+    assert sch.check(lambda v: A @ v, V) and sch.reason == "init"
+    sch.refreshed(); sch.tick(1.0)
+    H = Counter(A)
+    assert not sch.check(H, V, 1.2) and H.n == 3 and sch.residual < 1e-2
+    assert sch.check(H, V, 2.0) and sch.reason == "ps_drift"
+    B = A + 5.0 * torch.diag(torch.linspace(0.0, 1.0, 60))
+    assert sch.check(lambda v: B @ v, V) and sch.reason == "residual"
+def test_chebyshev_topk_matches_dense_on_clustered_spectrum():
+    from src.instrument.lanczos import chebyshev_topk
+    D = 120
+    g = torch.Generator().manual_seed(5)
+    Q, _ = torch.linalg.qr(torch.randn(D, D, generator=g, dtype=torch.float64))
+    evals = torch.cat([torch.tensor([40.0, 25.0, 10.0], dtype=torch.float64),
+                       torch.linspace(0.0, 9.0, D - 3, dtype=torch.float64)])
+    A = ((Q * evals) @ Q.t()).float()
+    info = {}
+    H_c = Counter(A); lam, V = chebyshev_topk(H_c, dim=D, k=3, iters=200, tol=1e-4, upper=45.0, info=info)
+    assert torch.allclose(lam, torch.tensor([40.0, 25.0, 10.0]), atol=1e-2)
+    assert info["converged"] and torch.allclose(V.t() @ V, torch.eye(3), atol=1e-4)
+    assert H_c.n == info["matvecs"] <= 200 * 3
+def test_nystrom_topk_sketch_and_error_bound():
+    from src.instrument.nystrom import nystrom_topk
+    A, evals = _sym_matrix(seed=6)
+    ref = evals[torch.argsort(evals.abs(), descending=True)][:4].float()
+    info = {}
+    lam, V = nystrom_topk(lambda v: A @ v, 60, k=4, oversample=10, power_iters=2, info=info)
+    assert torch.allclose(lam, ref, atol=1e-2) and info["matvecs"] == 3 * 14 + 4
+    true_err = float(torch.linalg.matrix_norm(A - (V * lam) @ V.t(), ord=2))
+    assert true_err <= info["err_bound"]
+    g = torch.Generator().manual_seed(7)
+    Q, _ = torch.linalg.qr(torch.randn(60, 60, generator=g))
+    P = (Q * torch.cat([torch.tensor([9.0, 4.0, 2.0]), torch.full((57,), 1e-4)])) @ Q.t()
+    lam_p, _ = nystrom_topk(lambda v: P @ v, 60, k=3, oversample=10, power_iters=0, psd=True, err_probes=0)
+    assert torch.allclose(lam_p, torch.tensor([9.0, 4.0, 2.0]), atol=1e-2)
+    with pytest.raises(ValueError):
+        nystrom_topk(lambda v: A @ v, 60, k=4, power_iters=0, psd=False)
@@ -0,0 +1,15 @@
+import torch
+from src.instrument.gamma import gamma_power, gamma_block
+def test_gamma_block_matches_dense_norm_and_power():
+    g = torch.Generator().manual_seed(0)
+    D, k = 40, 3
+    B = torch.randn(D, D, generator=g, dtype=torch.float64); A = (B + B.t()) / 2
+    V, _ = torch.linalg.qr(torch.randn(D, k, generator=g, dtype=torch.float64))
+    P_S = V @ V.t(); P_B = torch.eye(D, dtype=torch.float64) - P_S
+    ref = float(torch.linalg.matrix_norm(P_S @ A @ P_B, ord=2))
+    gam, lam, used = gamma_block(lambda v: A @ v, V)
+    assert abs(gam - ref) < 1e-8 and abs(lam - ref**2) < 1e-6 and used == k
+    A32, v1 = A.float(), V[:, :1].float().contiguous()  # gamma_power draws float32 start vectors
+    gam_p, _, _ = gamma_power(lambda v: A32 @ v, v1, iters=200, tol=1e-10)
+    gam_b, _, _ = gamma_block(lambda v: A32 @ v, v1)
+    assert abs(gam_p - gam_b) < 1e-3 * max(1.0, gam_b)
@@ -17,3 +17,109 @@ def test_hvp_symmetry():
     assert torch.allclose(Hv_v, v, atol=1e-6)
     assert torch.allclose(Hv_w, w, atol=1e-6)
     assert abs(v @ Hv_w - w @ Hv_v) < 1e-6
+class TinyNet(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.net = nn.Sequential(nn.Linear(4, 6), nn.BatchNorm1d(6), nn.Tanh(), nn.Linear(6, 3))
+    def forward(self, x):
+        return self.net(x)
+def ce_loss(m, batch):
+    x, y = batch
+    return nn.functional.cross_entropy(m(x), y)
+def _tiny_setup():
+    torch.manual_seed(0)
+    m = TinyNet().double(); m.train()
+    batch = (torch.randn(16, 4, dtype=torch.float64), torch.randint(0, 3, (16,)))
+    D = sum(p.numel() for p in m.parameters())
+    return m, batch, D
+def test_hvp_fwdrev_matches_autograd():
+    from src.instrument.hvp import hvp_fwdrev
+    m, batch, D = _tiny_setup()
+    v = torch.randn(D, dtype=torch.float64)
+    rm = m.net[1].running_mean.clone()
+    ref = hvp(ce_loss, m, batch, v)
+    out = hvp_fwdrev(ce_loss, m, batch, v)
+    assert torch.allclose(out, ref, atol=1e-8, rtol=1e-6)
+    # fwdrev leaves BN running stats untouched
+    m.net[1].running_mean.copy_(rm)
+    hvp_fwdrev(ce_loss, m, batch, v)
+    assert torch.equal(m.net[1].running_mean, rm)
+def test_hvp_block_matches_columns():
+    from src.instrument.hvp import hvp_block
+    m, batch, D = _tiny_setup()
+    V = torch.randn(D, 3, dtype=torch.float64)
+    ref = torch.stack([hvp(ce_loss, m, batch, V[:, j]) for j in range(3)], dim=1)
+    for method in ("vmap", "graph"):
+        HV = hvp_block(ce_loss, m, batch, V, method=method)
+        assert HV.shape == (D, 3)
+        assert torch.allclose(HV, ref, atol=1e-8, rtol=1e-6)
+def test_hessian_operator_reuses_graph():
+    from src.instrument.hvp import HessianOperator
+    m, batch, D = _tiny_setup()
+    v = torch.randn(D, dtype=torch.float64); V = torch.randn(D, 2, dtype=torch.float64)
+    ref = hvp(ce_loss, m, batch, v)
+    for backend in ("autograd", "fwdrev"):
+        with HessianOperator(m, ce_loss, batch, backend=backend) as H:
+            assert torch.allclose(H(v), ref, atol=1e-8, rtol=1e-6)
+            with torch.no_grad():
+                assert torch.allclose(H(v), ref, atol=1e-8, rtol=1e-6)
+            assert torch.allclose(H.matmat(V)[:, 1], hvp(ce_loss, m, batch, V[:, 1]), atol=1e-8, rtol=1e-6)
+        assert H.closed
+def test_ggn_operator_matches_explicit_ggn():
+    from src.instrument.ggn import GGNOperator
+    from torch.func import functional_call, jacrev
+    m, batch, D = _tiny_setup()
+    x, _y = batch
+    params = {n: p.detach() for n, p in m.named_parameters()}
+    m.eval()  # explicit reference with fixed BN stats on both sides
+    J = jacrev(lambda p: functional_call(m, p, (x,)))(params)
+    J = torch.cat([j.reshape(x.shape[0], 3, -1) for j in J.values()], dim=2)  # (N, C, D)
+    probs = torch.softmax(m(x), dim=1)
+    H_L = torch.diag_embed(probs) - probs.unsqueeze(2) * probs.unsqueeze(1)
+    G = torch.einsum("ncd,nce,nef->df", J, H_L, J) / x.shape[0]
+    v = torch.randn(D, dtype=torch.float64)
+    with GGNOperator(m, batch, kind="ggn") as op:
+        assert torch.allclose(op(v), G @ v, atol=1e-8, rtol=1e-6)
+    with GGNOperator(m, batch, kind="fisher", seed=0) as op:
+        assert float(v @ op(v)) >= -1e-10
+def test_block_operator_matches_hessian_block():
+    from src.instrument.hvp import HessianOperator, BlockOperator
+    from src.utils.flatten import parameter_groups
+    m, batch, D = _tiny_setup()
+    groups = parameter_groups(m, depth=2)
+    assert [g[0] for g in groups] == ["net.0", "net.1", "net.3"] and groups[-1][2] == D
+    name, l0, l1, ps = groups[0]
+    v_b = torch.randn(l1 - l0, dtype=torch.float64)
+    full = torch.zeros(D, dtype=torch.float64); full[l0:l1] = v_b
+    ref = hvp(ce_loss, m, batch, full)[l0:l1]
+    for backend in ("autograd", "fwdrev"):
+        with HessianOperator(m, ce_loss, batch, backend=backend) as H:
+            assert torch.allclose(BlockOperator(H, l0, l1, ps)(v_b), ref, atol=1e-8, rtol=1e-6)
+            assert torch.allclose(BlockOperator(H, l0, l1)(v_b), ref, atol=1e-8, rtol=1e-6)
+def test_hvp_fd_matches_autograd():
+    from src.instrument.hvp import hvp_fd
+    m, batch, D = _tiny_setup()
+    v = torch.randn(D, dtype=torch.float64)
+    theta0 = torch.cat([p.detach().reshape(-1).clone() for p in m.parameters()])
+    ref = hvp(ce_loss, m, batch, v)
+    out = hvp_fd(ce_loss, m, batch, v, eps=1e-4)
+    out_r = hvp_fd(ce_loss, m, batch, v, eps=1e-3, richardson=True)
+    assert torch.allclose(out, ref, atol=1e-6, rtol=1e-5)
+    assert torch.allclose(out_r, ref, atol=1e-8, rtol=1e-6)
+    assert torch.equal(torch.cat([p.detach().reshape(-1) for p in m.parameters()]), theta0)
+def test_microbatch_grads_match_loop_and_keep_bn_stats():
+    from src.instrument.persample import microbatch_grads
+    from src.instrument.hvp import frozen_bn_stats
+    from src.instrument.snr import GradNoiseAccumulator
+    m, batch, D = _tiny_setup()
+    rm = m.net[1].running_mean.clone()
+    G = torch.stack(list(microbatch_grads(ce_loss, m, batch, 4, chunk_size=3)), dim=1)
+    assert G.shape == (D, 4) and torch.equal(m.net[1].running_mean, rm)
+    x, y = batch
+    for j in range(4):
+        with frozen_bn_stats(m):
+            gs = torch.autograd.grad(ce_loss(m, (x[4*j:4*j+4], y[4*j:4*j+4])), list(m.parameters()))
+        assert torch.allclose(G[:, j], torch.cat([g.reshape(-1) for g in gs]), atol=1e-10)
+    acc = GradNoiseAccumulator(torch.eye(D, dtype=torch.float64)[:, :2], scale=0.25)
+    for g in microbatch_grads(ce_loss, m, batch, 4, chunk_size=1): acc.update(g)
+    assert abs(acc.trace_full() - 0.25 * float(G.var(dim=1).sum())) < 1e-10
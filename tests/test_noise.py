@@ -0,0 +1,71 @@
+import torch
+from src.instrument.snr import noise_trace_ps_sigma, GradNoiseAccumulator
+def test_welford_accumulator_matches_stacked_estimates():
+    g = torch.Generator().manual_seed(0)
+    D, k, M = 200, 3, 9
+    V, _ = torch.linalg.qr(torch.randn(D, k, generator=g))
+    samples = [torch.randn(D, generator=g) + 5.0 for _ in range(M)]
+    acc = GradNoiseAccumulator(V)
+    for s in samples: acc.update(s)
+    G = torch.stack(samples, dim=1)
+    assert abs(acc.trace_full() - float(G.var(dim=1).sum())) < 1e-3
+    assert abs(acc.trace_ps() - noise_trace_ps_sigma(samples, V)) < 1e-4
+    assert torch.allclose(acc.mean, G.mean(dim=1), atol=1e-5)
+def test_aux_stream_is_reproducible_and_logs_indices():
+    from torch.utils.data import TensorDataset
+    from src.datasets.aux_stream import AuxBatchStream
+    ds = TensorDataset(torch.arange(10.0).unsqueeze(1), torch.arange(10))
+    a = AuxBatchStream(ds, batch_size=4, num_workers=0, seed=3)
+    b = AuxBatchStream(ds, batch_size=4, num_workers=0, seed=3)
+    xa = [x for x, _ in a.take(5, tag="noise")]
+    xb = [x for x, _ in b.take(5)]
+    assert all(torch.equal(u, v) for u, v in zip(xa, xb))
+    log = a.drain_log()
+    assert len(log) == 5 and log[0]["tag"] == "noise" and a.drain_log() == []
+    assert all(sorted(e["indices"]) == sorted(int(v) for v in x.squeeze(1)) for e, x in zip(log, xa))
+    assert a.epochs >= 2  # 2 batches per shuffle, drawn across epochs without restarting
+def test_grad_sketch_trace_and_top_eigenvalue():
+    from src.instrument.snr import GradSketch
+    g = torch.Generator().manual_seed(1)
+    D, M = 500, 60
+    u = torch.randn(D, generator=g); u /= u.norm()
+    sk = GradSketch(D, s=256, seed=4, chunk=128)
+    acc = GradNoiseAccumulator(torch.eye(D)[:, :2], sketch=sk)
+    for _ in range(M):
+        acc.update(torch.randn(D, generator=g) + 10.0 * torch.randn((), generator=g) * u)
+    assert torch.equal(sk.project(u), sk.project(u))
+    assert abs(acc.trace_sketch() - acc.trace_full()) < 0.25 * acc.trace_full()
+    top = acc.spectrum_sketch(top=2)
+    assert 50.0 < float(top[0]) < 200.0 and float(top[1]) < 0.5 * float(top[0])
+def test_noise_reservoir_pools_steps_and_follows_rebase():
+    from src.instrument.snr import NoiseReservoir
+    g = torch.Generator().manual_seed(2)
+    D, k, T = 50, 3, 400
+    V, _ = torch.linalg.qr(torch.randn(D, k, generator=g))
+    res = NoiseReservoir(V, decay=1.0, size=T)
+    for t in range(T):
+        acc = GradNoiseAccumulator(V)
+        for _ in range(2):
+            acc.update(torch.randn(D, generator=g) + 0.1 * t)   # drifting mean, unit noise
+        res.add(acc)
+    assert abs(res.ess() - T) < 1e-6
+    assert abs(res.trace_ps() - k) < 0.3 * k and abs(res.trace_full() - D) < 0.1 * D
+    tr = res.trace_ps()
+    Rot, _ = torch.linalg.qr(torch.randn(k, k, generator=g))
+    res.rebase(V @ Rot)
+    assert abs(res.trace_ps() - tr) < 1e-6 and abs(res.ess() - T) < 1e-6
+    full, ess = res.trace_full(), res.ess()
+    # partial overlap: every new direction keeps half of an old one
+    Vr = V @ Rot
+    Q, _ = torch.linalg.qr(torch.cat([Vr, torch.randn(D, k, generator=g)], dim=1))
+    W = (Vr + Q[:, k:]) / 2 ** 0.5
+    res.rebase(W)
+    assert abs(res.trace_ps() - tr) < 1e-6   # not shrunk by the lost coverage
+    assert res.trace_full() == full and res.ess() == ess
+    acc = GradNoiseAccumulator(W)
+    for _ in range(2): acc.update(torch.randn(D, generator=g))
+    res.add(acc)   # fully covered newest entry outweighs the half-covered history
+    assert res.ess(subspace=True) < res.ess()
+    half = NoiseReservoir(V, decay=0.5, size=T)
+    for _ in range(50): half.add(acc)
+    assert abs(half.ess() - 3.0) < 1e-3   # (sum w)^2 / sum w^2 -> (2)^2 / (4/3)
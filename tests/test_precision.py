@@ -0,0 +1,35 @@
+import math
+import torch
+from torch import nn
+from src.utils.precision import autocast, autocast_dtype
+from src.runners.precision_drift import drift_report
+from src.runners.train_cifar import _get_grad_flat, cross_entropy_loss
+class SmallNet(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.net = nn.Sequential(nn.Linear(4, 6), nn.BatchNorm1d(6), nn.Tanh(), nn.Linear(6, 3))
+    def forward(self, x):
+        return self.net(x)
+def _setup():
+    torch.manual_seed(0)
+    m = SmallNet(); m.train()
+    return m, (torch.randn(16, 4), torch.randint(0, 3, (16,)))
+def test_autocast_is_noop_for_fp32_and_lowers_matmul_for_bf16():
+    assert autocast_dtype("fp32") is None
+    x = torch.randn(3, 3)
+    with autocast("cpu", None):
+        assert (x @ x).dtype == torch.float32
+    with autocast("cpu", autocast_dtype("bf16")):
+        assert (x @ x).dtype == torch.bfloat16
+def test_amp_grad_is_close_to_fp32():
+    m, batch = _setup()
+    g32 = _get_grad_flat(m, batch, cross_entropy_loss)
+    g16 = _get_grad_flat(m, batch, cross_entropy_loss, torch.bfloat16)
+    assert g16.dtype == torch.float32 and float((g16 - g32).norm() / g32.norm()) < 0.1
+def test_drift_report_runs_for_every_precision():
+    m, batch = _setup()
+    rep = drift_report(m, batch, "fp32", reps=2, power_iters=5)
+    assert rep["hvp_max_rel_err"] < 1e-6 and rep["deltaL_abs_err"] < 1e-6 and rep["grad_rel_err"] < 1e-6
+    rep = drift_report(m, batch, "bf16", reps=2, power_iters=5)
+    assert all(math.isfinite(rep[k]) for k in ("hvp_max_rel_err", "lambda_max_rel_err", "grad_cos", "deltaL_bf16"))
+    assert rep["grad_cos"] > 0.95
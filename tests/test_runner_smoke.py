@@ -0,0 +1,30 @@
+import csv, glob, math, os, sys
+import torch
+from src.runners import train_cifar
+NO_CURV = ("--eig_freq", "0", "--skip_eos")
+def _run(tmp_path, monkeypatch, *extra, max_steps=2):
+    argv = ["train_cifar", "--dummy_data", "--dummy_size", "32", "--batch_size", "8", "--workers", "0",
+            "--cpu", "--k", "2", "--skip_intervene", "--skip_eval",
+            "--max_steps", str(max_steps), "--logdir", str(tmp_path), *extra]
+    monkeypatch.setattr(sys, "argv", argv)
+    train_cifar.main()
+    with open(glob.glob(os.path.join(str(tmp_path), "*", "metrics.csv"))[0], encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+def test_train_cifar_noise_reservoir_runs(tmp_path, monkeypatch):
+    rows = _run(tmp_path, monkeypatch, *NO_CURV, "--noise_M", "2", "--noise_reservoir", "--noise_sketch", "16")
+    assert len(rows) == 2 and float(rows[1]["noise_ess"]) > float(rows[0]["noise_ess"])
+def test_curvature_subbatch_size_frac_seed():
+    x = torch.arange(20.).view(10, 2); y = torch.arange(10); batch = (x, y)
+    assert train_cifar.curvature_subbatch(batch, size=3)[0].shape[0] == 3
+    xs, ys = train_cifar.curvature_subbatch(batch, frac=0.5, seed=1)
+    assert xs.shape[0] == 5 and torch.equal(xs[:, 0] / 2, ys.float())
+    assert torch.equal(xs, train_cifar.curvature_subbatch(batch, frac=0.5, seed=1)[0])
+    assert not torch.equal(xs, train_cifar.curvature_subbatch(batch, frac=0.5, seed=2)[0])
+    assert train_cifar.curvature_subbatch(batch) is batch
+    assert train_cifar.curvature_subbatch(batch, size=50) is batch
+def test_train_cifar_curv_subbatch_check(tmp_path, monkeypatch):
+    rows = _run(tmp_path, monkeypatch, "--eig_freq", "1", "--eig_solver", "nystrom", "--nystrom_oversample", "2",
+                "--noise_M", "2", "--curv_batch_frac", "0.5", "--curv_check_freq", "1", max_steps=1)
+    assert int(rows[0]["curv_batch"]) == 4
+    for key in ("mu_full", "lambda_max_full", "mu_sub_rms", "lam_sub_rms"):
+        assert math.isfinite(float(rows[0][key])), key
@@ -0,0 +1,29 @@
+import torch
+from src.instrument.slq import slq_density, spectral_histogram, slq_trace
+def _diag_op(evals):
+    return lambda v: evals * v
+def test_slq_recovers_extremes_and_trace():
+    D = 200
+    evals = torch.cat([torch.tensor([40.0, 25.0]), torch.linspace(-1.0, 2.0, D - 2)])
+    nodes, weights = slq_density(_diag_op(evals), D, probes=8, depth=30, seed=0, reorth=True)
+    assert nodes.shape == (8, 30) and torch.allclose(weights.sum(dim=1), torch.ones(8), atol=1e-5)
+    assert abs(float(nodes.max()) - 40.0) < 1e-2 and abs(float(nodes.min()) + 1.0) < 0.3
+    assert abs(slq_trace(nodes, weights, D) - float(evals.sum())) < 1e-3 * float(evals.sum())
+    edges, mass = spectral_histogram(nodes, weights, bins=20)
+    assert edges.shape == (21,) and abs(float(mass.sum()) - 1.0) < 1e-6
+def test_hutchpp_uses_subspace_and_diagonal_estimate():
+    from src.instrument.hutch import hutchpp_trace, hutch_diagonal, diagonal_by_layer
+    D = 100
+    evals = torch.cat([torch.tensor([60.0, 30.0]), torch.linspace(0.0, 1.0, D - 2)])
+    g = torch.Generator().manual_seed(0)
+    Q, _ = torch.linalg.qr(torch.randn(D, D, generator=g))
+    A = (Q * evals) @ Q.t()
+    V = Q[:, :2].contiguous()
+    est = hutchpp_trace(lambda v: A @ v, D, V=V, probes=32, seed=1)
+    assert abs(est["trace_S"] - 90.0) < 1e-3
+    assert abs(est["trace"] - float(evals.sum())) < 3.0 * est["trace_B_se"] + 1e-3
+    assert abs(hutchpp_trace(lambda v: A @ v, D, probes=32, sketch=4, seed=2)["trace"] - float(evals.sum())) < 10.0
+    d = hutch_diagonal(lambda v: torch.diag(torch.arange(1.0, D + 1)) @ v, D, probes=4)
+    assert torch.allclose(d, torch.arange(1.0, D + 1))
+    rows = diagonal_by_layer(d, [("a", 0, 10, []), ("b", 10, D, [])])
+    assert rows[0]["diag_sum"] == 55.0 and rows[1]["dim"] == 90
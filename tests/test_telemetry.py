@@ -0,0 +1,22 @@
+import math
+import pytest
+import torch
+from src.instrument.operator import OperatorTelemetry, apply_block
+def test_telemetry_counts_matvecs_per_section_and_resets():
+    A = torch.diag(torch.arange(1.0, 6.0))
+    tel = OperatorTelemetry("cpu")
+    tel.begin_step()
+    op = tel.wrap(lambda v: A @ v, "topk")
+    op(torch.ones(5)); op.matvec(torch.ones(5), out=torch.empty(5))
+    assert torch.allclose(apply_block(tel.wrap(lambda v: A @ v, "hutch"), torch.eye(5)), A)
+    row = tel.step_row()
+    assert list(row) == OperatorTelemetry.fieldnames()
+    assert row["mv_topk"] == 2 and row["mv_hutch"] == 5 and row["mv_eos"] == 0 and row["mv_total"] == 7
+    assert math.isnan(row["curv_peak_mb"])   # no per-step peak on CPU
+    tel.begin_step()
+    assert tel.step_row()["mv_total"] == 0
+    summ = tel.summary()
+    assert summ["steps"] == 2 and summ["instrumented_steps"] == 1 and summ["matvecs"] == 7
+    assert summ["sections"]["hutch"]["matvecs"] == 5
+    with pytest.raises(ValueError):
+        tel.wrap(lambda v: v, "unknown")